@@ -1,4 +1,5 @@
 import os
+import time
 import yaml
 import argparse
 
@@ -10,6 +11,10 @@ parser.add_argument('--dataset', default='imagenet', type=str,
 parser.add_argument('--model', default = 'resnet50', type=str, help='model name')
 parser.add_argument('--num-gpus', default=1, type=int, help='number of GPUs used in training')
 parser.add_argument('--penalty-ratio', default=0.2, type=float, help='group lasso regularization penalty ratio')
+parser.add_argument('--lasso-mode', default='penalty', type=str, choices=['penalty', 'proximal'],
+                    help='group lasso as a loss penalty or as a proximal step after each optimizer step')
+parser.add_argument('--relaunch', default=False, action='store_true',
+                    help='relaunch the trainer at every reconfiguration interval (legacy mode)')
 args = parser.parse_args()
 
 # Load configuration
@@ -38,6 +43,13 @@ if args.dataset == 'imagenet':
 if not os.path.exists(cfg['base']['model_dir']):
     os.makedirs(cfg['base']['model_dir'])
 
+# Gated residual networks need the regenerated model files (ChannelMask/ChannelMerge modules):
+# they always run in the relaunch mode
+is_gating = cfg['base'].get('is_gating', False)
+relaunch = args.relaunch or is_gating
+if is_gating and not args.relaunch:
+    print("[INFO] is_gating: relaunching the trainer at every reconfiguration interval")
+
 # Data parallelism setup
 gpu_id = '0'
 for i in range(1,args.num_gpus):
@@ -48,13 +60,14 @@ arch_name = cfg['base']['arch']+'_'+cfg['base']['description']
 arch_out_dir = os.path.join(cfg['base']['model_dir'], 'arch', cfg['base']['description'])
 
 # Build command line
-# Iterate reconfiguration intervals
-for cur_epoch in range(0, cfg['base']['epochs'], cfg['pt']['sparse_interval']):
+def getCmdLine(epochs, arch_file_name):
     cmd_line = runfile
     cmd_line += ' --workers '               +str(cfg['base']['workers'])
+    cmd_line += ' --data-format '           +cfg['base']['data_format'] if 'data_format' in cfg['base'] else ''
+    cmd_line += ' --decode '                +cfg['base']['decode'] if 'decode' in cfg['base'] else ''
     cmd_line += ' --data_path '             +args.data_path if args.dataset == 'imagenet' else ''
     cmd_line += ' --dataset '               +args.dataset if args.dataset.startswith('cifar') else ''
-    cmd_line += ' --epochs '                +str(cur_epoch + cfg['pt']['sparse_interval'])
+    cmd_line += ' --epochs '                +str(epochs)
     cmd_line += ' --learning-rate '         +str(cfg['base']['learning-rate'])
     cmd_line += ' --schedule '              +str(cfg['base']['schedule'])
     cmd_line += ' --checkpoint '            +os.path.join(cfg['base']['model_dir'], cfg['base']['description'])
@@ -68,15 +81,39 @@ for cur_epoch in range(0, cfg['base']['epochs'], cfg['pt']['sparse_interval']):
     cmd_line += ' --sparse_interval '       +str(cfg['pt']['sparse_interval'])
     cmd_line += ' --threshold '             +str(cfg['pt']['threshold'])
     cmd_line += ' --var_group_lasso_coeff ' +str(args.penalty_ratio)
-    cmd_line += ' --arch_name '             +arch_name+'_'+str(cur_epoch+cfg['pt']['sparse_interval'])+'.py'
+    cmd_line += ' --arch_name '             +arch_file_name
     cmd_line += ' --en_group_lasso '        if cfg['pt']['en_group_lasso'] else ''
-    cmd_line += ' --arch_out_dir1 '         +cfg['base']['arch_dir']
+    cmd_line += ' --is_gating '             if is_gating else ''
+    cmd_line += ' --lasso-mode '            +args.lasso_mode
+    cmd_line += ' --arch_out_dir1 '         +cfg['base']['arch_dir'] if relaunch else ''
+    cmd_line += ' --inplace_reconf '        if not relaunch else ''
     cmd_line += ' --arch_out_dir2 '         +arch_out_dir if cfg['pt']['reconf_arch'] else ''
     cmd_line += ' >> '                      +os.path.join(cfg['base']['model_dir'], cfg['base']['description'])+'.log'
+    return cmd_line
+
+if relaunch:
+    # Iterate reconfiguration intervals
+    # Each launch re-imports the regenerated model file and resumes from the last checkpoint
+    for cur_epoch in range(0, cfg['base']['epochs'], cfg['pt']['sparse_interval']):
+        next_epoch = cur_epoch + cfg['pt']['sparse_interval']
+        cmd_line = getCmdLine(next_epoch, arch_name+'_'+str(next_epoch)+'.py')
+
+        print (cmd_line)
+        start = time.time()
+        os.system(cmd_line)
+        print ("[INFO] Interval [{}-{}]: {:.2f}s".format(cur_epoch+1, next_epoch, time.time() - start))
+
+        # Checkpoint to resume
+        checkpoint = 'checkpoint.pth.tar'
+        cfg['base']['resume'] = os.path.join(cfg['base']['model_dir'], cfg['base']['description'], 'checkpoint.pth.tar')
+
+else:
+    # Single launch for the whole schedule
+    # The trainer reconfigures the running model in place at every sparse_interval
+    # and reports the per-interval time and its one-time startup overhead in the log
+    cmd_line = getCmdLine(cfg['base']['epochs'], arch_name+'.py')
 
     print (cmd_line)
+    start = time.time()
     os.system(cmd_line)
-
-    # Checkpoint to resume
-    checkpoint = 'checkpoint.pth.tar'
-    cfg['base']['resume'] = os.path.join(cfg['base']['model_dir'], cfg['base']['description'], 'checkpoint.pth.tar')
+    print ("[INFO] Training: {:.2f}s".format(time.time() - start))
@@ -19,10 +19,12 @@ from __future__ import print_function
 
 import argparse
 import os
-import shutil
 import time
 import random
 
+# Launch time of the trainer (Startup overhead includes the imports below)
+launch_time = time.time()
+
 import torch
 import torch.nn as nn
 import torch.nn.parallel
@@ -33,9 +35,11 @@ import torchvision.transforms as transforms
 import torchvision.datasets as datasets
 import models.cifar as models
 
-from utils import Logger, AverageMeter, accuracy, mkdir_p, savefig
-from custom import _makeSparse, _genDenseModel, _DataParallel
-from custom import get_group_lasso_global, get_group_lasso_group
+from utils import Logger, EventLog, AverageMeter, accuracy, mkdir_p, savefig, tensor_cifar_loaders, verified_cifar
+from custom import _makeSparse, _genDenseModel, _applyArchSpec, _DataParallel
+from custom import GroupLassoRegularizer, LASSO_SCALES, getTrainingMacs
+from custom import AsyncCheckpointWriter, DeltaCheckpointer, loadCheckpoint, updateChannelMaps, getArchSpec
+from custom import LatencyTable, getModelLatency
 from custom_arch import *
 import numpy as np
 
@@ -49,6 +53,9 @@ parser = argparse.ArgumentParser(description='PyTorch CIFAR10/100 Training')
 parser.add_argument('-d', '--dataset', default='cifar10', type=str)
 parser.add_argument('-j', '--workers', default=4, type=int, metavar='N',
                     help='number of data loading workers (default: 4)')
+parser.add_argument('--data-format', default='torchvision', choices=['torchvision', 'tensor'], type=str,
+                    help='torchvision: per-sample transforms in DataLoader workers, '
+                    'tensor: in-memory uint8 dataset with batched augmentation (no workers)')
 parser.add_argument('--epochs', default=300, type=int, metavar='N',
                     help='number of total epochs to run')
 parser.add_argument('--start-epoch', default=1, type=int, metavar='N',
@@ -94,25 +101,43 @@ parser.add_argument('--global_group_lasso', default=True, action='store_true',
 parser.add_argument('--var_group_lasso_coeff', default=0.1, type=float,
                     help='Ratio = group-lasso / (group-lasso + loss)')
 parser.add_argument('--grp_lasso_coeff', default=0.0005, type=float,
-                    help='claim as a global param')
+                    help='claim as a global param (auto-tuned at the first iteration, restored from checkpoints)')
 parser.add_argument('--arch_out_dir1', default=None, type=str,
                     help='directory to store the temporary architecture file')
 parser.add_argument('--arch_out_dir2', default=None, type=str,
                     help='directory to architecture files matching to checkpoints ')
 parser.add_argument('--arch_name', default='net.py', type=str,
                     help='name of the new architecture')
+parser.add_argument('--compact_checkpoint', default=False, action='store_true',
+                    help='Also store the interval checkpoints in the compact (memory-mapped) format')
+parser.add_argument('--delta_checkpoint', default='none', choices=['none', 'exact', 'fp16', 'int8'], type=str,
+                    help='none: full checkpoint every epoch, '
+                    'exact/fp16/int8: full checkpoint at reconfigurations and the per-epoch difference (fp16/int8: quantized) in between')
+parser.add_argument('--latency_table', default=None, type=str,
+                    help='CPU latency lookup table (scripts/profile_latency.py) to report the predicted latency saved by each reconfiguration')
 parser.add_argument('--is_gating', default=False, action='store_true',
                     help='Use gating for residual network')
+parser.add_argument('--lasso-mode', default='penalty', choices=['penalty', 'proximal'], type=str,
+                    help='penalty: add the group lasso to the loss, '
+                    'proximal: shrink the channel groups after each optimizer step')
+parser.add_argument('--lasso_scale', default=None, choices=LASSO_SCALES, type=str,
+                    help='per-group lasso coefficient (overrides the global coefficient flag): global, '
+                    'params: sqrt(num_params), flops: training FLOPs of the channel group')
+parser.add_argument('--inplace_reconf', default=False, action='store_true',
+                    help='Reconfigure the running model in place without regenerating the model source')
 parser.add_argument('--threshold_type', default='max', choices=['max', 'mean'], type=str,
                     help='Thresholding type')
-parser.add_argument('--coeff_container', default='./coeff', type=str,
-                    help='Directory to store lasso coefficient')
+parser.add_argument('--coeff_container', default=None, type=str,
+                    help='Directory to export the auto-tuned lasso coefficient (optional)')
 parser.add_argument('--global_coeff', default=True, action='store_true',
                     help='Use a global group lasso regularizaiton coefficient')
 parser.add_argument('--print-freq', default=10, type=int,
                     metavar='N', help='print frequency (default: 10)') 
 
 args = parser.parse_args()
+# In-place reconfiguration does not insert the ChannelMask/ChannelMerge modules of the gated models
+if args.inplace_reconf and args.is_gating:
+    parser.error('--inplace_reconf does not support --is_gating (relaunch the trainer with the generated model files)')
 state = {k: v for k, v in args._get_kwargs()}
 
 # Validate dataset
@@ -131,6 +156,7 @@ if use_cuda:
     torch.cuda.manual_seed_all(args.manualSeed)
 
 best_acc = 0  # best test accuracy
+MFLOPS = 1000000/2  # MUL + ADD
 
 def main():
     global best_acc
@@ -153,21 +179,30 @@ def main():
         transforms.ToTensor(),
         transforms.Normalize((0.4914, 0.4822, 0.4465), (0.2023, 0.1994, 0.2010)),
     ])
+    # The md5 check of the batch files (download=True) runs once, not on every launch
     if args.dataset == 'cifar10':
-        dataloader = datasets.CIFAR10
+        dataloader = verified_cifar(datasets.CIFAR10)
         num_classes = 10
     else:
-        dataloader = datasets.CIFAR100
+        dataloader = verified_cifar(datasets.CIFAR100)
         num_classes = 100
 
-    trainset = dataloader(root='./dataset/data/torch', train=True, download=True, transform=transform_train)
-    trainloader = data.DataLoader(trainset, 
-                                batch_size=args.train_batch, 
-                                shuffle=True, 
-                                num_workers=args.workers)
-
-    testset = dataloader(root='./dataset/data/torch', train=False, download=False, transform=transform_test)
-    testloader = data.DataLoader(testset, batch_size=args.test_batch, shuffle=False, num_workers=args.workers)
+    if args.data_format == 'tensor':
+        # Whole split as one uint8 tensor on the training device: crop, flip and normalize per batch
+        trainloader, testloader = tensor_cifar_loaders(dataloader, './dataset/data/torch', args.train_batch, args.test_batch,
+                                                       device='cuda' if use_cuda else 'cpu')
+    else:
+        trainset = dataloader(root='./dataset/data/torch', train=True, download=True, transform=transform_train)
+        # Keep the worker pools alive across epochs and reconfigurations
+        trainloader = data.DataLoader(trainset, 
+                                    batch_size=args.train_batch, 
+                                    shuffle=True, 
+                                    num_workers=args.workers,
+                                    persistent_workers=args.workers > 0)
+
+        testset = dataloader(root='./dataset/data/torch', train=False, download=False, transform=transform_test)
+        testloader = data.DataLoader(testset, batch_size=args.test_batch, shuffle=False, num_workers=args.workers,
+                                     persistent_workers=args.workers > 0)
 
     # Model
     print("==> creating model '{}'".format(args.arch))
@@ -184,6 +219,12 @@ def main():
     criterion = nn.CrossEntropyLoss()
     optimizer = optim.SGD(model.parameters(), lr=args.lr, momentum=args.momentum, weight_decay=args.weight_decay)
 
+    # Group lasso regularizer (Layer metadata is cached until the next reconfiguration)
+    regularizer = GroupLassoRegularizer(model, args.arch, args.global_group_lasso, scale=args.lasso_scale, dataset='cifar')
+
+    # Channel indexes of each layer in the original model (Composed over reconfigurations)
+    ch_maps = {}
+
     # Resume
     title = 'cifar-10-' + args.arch
     if args.resume:
@@ -191,11 +232,27 @@ def main():
         print('==> Resuming from checkpoint..')
         assert os.path.isfile(args.resume), 'Error: no checkpoint directory found!'
         args.checkpoint = os.path.dirname(args.resume)
-        checkpoint = torch.load(args.resume)
+        checkpoint = loadCheckpoint(args.resume)
         best_acc = checkpoint['best_acc']
         start_epoch = checkpoint['epoch'] +1
+        if 'arch_spec' in checkpoint:
+            # Pruned checkpoint: reshape the model to the stored layers (No generated architecture file)
+            _applyArchSpec(model, checkpoint['arch_spec'], optimizer)
+            regularizer.build(model)
         model.load_state_dict(checkpoint['state_dict'])
         optimizer.load_state_dict(checkpoint['optimizer'])
+        ch_maps = checkpoint.get('ch_maps', {})
+        if 'grp_lasso_coeff' in checkpoint:
+            args.grp_lasso_coeff = checkpoint['grp_lasso_coeff']
+        else:
+            # Checkpoints without the coefficient: read the exported coefficient once
+            coeff_file = os.path.join(args.coeff_container or './coeff', 'cifar', args.arch, str(args.var_group_lasso_coeff))
+            if os.path.isfile(coeff_file):
+                with open(coeff_file, 'r') as f_coeff:
+                    for line in f_coeff:
+                        args.grp_lasso_coeff = float(line)
+            elif args.en_group_lasso:
+                print('[WARNING] No group lasso coefficient to restore, using %f' % args.grp_lasso_coeff)
         logger = Logger(os.path.join(args.checkpoint, 'log.txt'), title=title, resume=True)
     else:
         logger = Logger(os.path.join(args.checkpoint, 'log.txt'), title=title)
@@ -208,70 +265,151 @@ def main():
         print(' Test Loss:  %.8f, Test Acc:  %.2f' % (test_loss, test_acc))
         return
 
+    # Checkpoints are serialized by a background thread (Training does not wait for the disk)
+    ckpt_writer = AsyncCheckpointWriter(args.checkpoint)
+    delta_ckpt = DeltaCheckpointer(ckpt_writer, args.delta_checkpoint) if args.delta_checkpoint != 'none' else None
+
+    # Predicted (CPU) latency of the model before/after each reconfiguration
+    latency_table = None
+    if args.latency_table:
+        assert os.path.isfile(args.latency_table), 'Error: no latency table [%s]' % args.latency_table
+        latency_table = LatencyTable(args.latency_table)
+
+    # Startup overhead: imports, device init, dataset construction, model creation and checkpoint reload
+    startup_time = time.time() - launch_time
+    print('[INFO] Startup: %.2fs' % startup_time)
+
+    # Structured event stream (Epoch summaries, reconfigurations with the layer shapes, timings)
+    events = EventLog(os.path.join(args.checkpoint, 'events.jsonl'))
+    events.write('start', arch=args.arch, dataset='cifar', start_epoch=start_epoch, epochs=args.epochs,
+                 resume=args.resume, startup=startup_time, layers=layer_shapes(model),
+                 lasso_scale=regularizer.scale_mode)
+    interval_start, interval_epoch, num_intervals = time.time(), start_epoch, 0
+
     # Train and val
     for epoch in range(start_epoch, args.epochs+1):
         adjust_learning_rate(optimizer, epoch)
 
         print('\nEpoch: [%d | %d] LR: %f' % (epoch, args.epochs, state['lr']))
 
-        train_loss, train_acc, lasso_ratio, train_epoch_time = train(trainloader, model, criterion, optimizer, epoch, use_cuda)
+        train_loss, train_acc, lasso_ratio, train_epoch_time = train(trainloader, model, criterion, optimizer, regularizer, epoch, use_cuda)
         test_loss, test_acc, test_epoch_time = test(testloader, model, criterion, epoch, use_cuda)
 
         # append logger file
         logger.append([state['lr'], train_loss, test_loss, train_acc, test_acc, lasso_ratio, train_epoch_time, test_epoch_time])
+        events.write('epoch', epoch=epoch, lr=state['lr'], train_loss=train_loss, test_loss=test_loss,
+                     train_acc=train_acc, test_acc=test_acc, lasso_ratio=lasso_ratio,
+                     train_time=train_epoch_time, test_time=test_epoch_time)
 
         # SparseTrain routine
-        if args.en_group_lasso and (epoch % args.sparse_interval == 0):
+        is_reconf = args.en_group_lasso and (epoch % args.sparse_interval == 0)
+        if is_reconf:
+            reconf_start = time.time()
+            latency_ms, train_mflops = [None, None], [getTrainingMacs(model, 'cifar') / MFLOPS, None]
+            conv_chs = [num_conv_chs(model), None]
+            if latency_table is not None:
+                latency_ms[0] = getModelLatency(model, 'cifar', latency_table)[0]
+
             # Force weights under threshold to zero
             dense_chs, chs_map = _makeSparse(model, args.threshold, args.arch, 
                                              args.threshold_type,
                                              'cifar',
                                              is_gating=args.is_gating)
             # Reconstruct architecture
-            if args.arch_out_dir2 != None:
-                _genDenseModel(model, dense_chs, optimizer, args.arch, 'cifar')
+            if args.inplace_reconf or args.arch_out_dir2 != None:
+                _genDenseModel(model, dense_chs, optimizer, args.arch, 'cifar', inplace=args.inplace_reconf)
+                regularizer.build(model)
+                updateChannelMaps(ch_maps, dense_chs)
+                train_mflops[1], conv_chs[1] = getTrainingMacs(model, 'cifar') / MFLOPS, num_conv_chs(model)
+                print('[INFO] Training cost per sample: %.1f >> %.1f MFLOPs (%.1f%% saved by removing %.1f%% of the conv channels, %s lasso scale)'
+                      % (train_mflops[0], train_mflops[1], 100. * (1. - train_mflops[1] / train_mflops[0]),
+                         100. * (1. - float(conv_chs[1]) / conv_chs[0]), regularizer.scale_mode))
+                if latency_table is not None:
+                    latency_ms[1] = getModelLatency(model, 'cifar', latency_table)[0]
+                    print('[INFO] Predicted latency (fwd+bwd, batch %d): %.2fms >> %.2fms (%.1f%% saved)'
+                          % (latency_table.batch, latency_ms[0], latency_ms[1],
+                             100. * (1. - latency_ms[1] / max(latency_ms[0], 1e-9))))
+
+            # Architecture file (In-place mode: artifact only, the model source is not overwritten)
+            if args.arch_out_dir2 != None and args.arch in custom_arch_cifar:
                 _genDenseArch = custom_arch_cifar[args.arch]
+                if args.inplace_reconf:
+                    arch_out_dir1 = None
+                    arch_name = os.path.splitext(args.arch_name)[0]+'_'+str(epoch)+'.py'
+                else:
+                    arch_out_dir1, arch_name = args.arch_out_dir1, args.arch_name
                 if 'resnet' in args.arch:
-                    _genDenseArch(model, args.arch_out_dir1, args.arch_out_dir2, 
-                                args.arch_name, dense_chs, 
+                    _genDenseArch(model, arch_out_dir1, args.arch_out_dir2, 
+                                arch_name, dense_chs, 
                                 chs_map, args.is_gating)
                 else:
-                    _genDenseArch(model, args.arch_out_dir1, args.arch_out_dir2, 
-                                args.arch_name, dense_chs, chs_map)
-
+                    _genDenseArch(model, arch_out_dir1, args.arch_out_dir2, 
+                                arch_name, dense_chs, chs_map)
+
+            print('[INFO] Reconfiguration: %.2fs' % (time.time() - reconf_start))
+            # layers: weight shapes after the reconfiguration, dense: [dense out_chs, dense in_chs] (Gating)
+            # latency_ms: predicted latency before/after the reconfiguration (--latency_table)
+            # train_mflops, conv_chs: training cost per sample and conv output channels before/after
+            events.write('reconf', epoch=epoch, seconds=time.time() - reconf_start, layers=layer_shapes(model),
+                         latency_ms=latency_ms, train_mflops=train_mflops, conv_chs=conv_chs,
+                         dense=dict((name.split('module.')[-1].rsplit('.', 1)[0], [len(chs['out_chs']), len(chs['in_chs'])])
+                                    for name, chs in dense_chs.items()))
+
+        # Per-interval time (Training, test and reconfiguration)
+        if args.sparse_interval > 0 and (epoch % args.sparse_interval == 0 or epoch == args.epochs):
+            num_intervals += 1
+            print('[INFO] Interval [%d-%d]: %.2fs' % (interval_epoch, epoch, time.time() - interval_start))
+            events.write('interval', start=interval_epoch, end=epoch, seconds=time.time() - interval_start)
+            interval_start, interval_epoch = time.time(), epoch +1
 
         # save model
         is_best = test_acc > best_acc
         best_acc = max(test_acc, best_acc)
 
         print("[INFO] Storing checkpoint...")
-        save_checkpoint({
+        # One serialization per epoch: the interval and best checkpoints are links of it
+        ckpt_links = []
+        if epoch % args.save_checkpoint == 0:
+            # Leave unique checkpoint of pruned models druing training
+            ckpt_links.append('checkpoint'+str(epoch)+'.tar')
+        if is_best:
+            ckpt_links.append('model_best.pth.tar')
+        ckpt_state = {
                 'epoch': epoch,
                 'state_dict': model.state_dict(),
                 'acc': test_acc,
                 'best_acc': best_acc,
-                'optimizer' : optimizer.state_dict(),},
-                is_best, 
-                checkpoint=args.checkpoint)
-
-        # Leave unique checkpoint of pruned models druing training
-        if epoch % args.save_checkpoint == 0:
-            save_checkpoint({
-                    'epoch': epoch,
-                    'state_dict': model.state_dict(),
-                    'acc': test_acc,
-                    'best_acc': best_acc,
-                    'optimizer' : optimizer.state_dict(),},
-                    is_best, 
-                    checkpoint=args.checkpoint,
-                    filename='checkpoint'+str(epoch)+'.tar')
+                'optimizer' : optimizer.state_dict(),
+                'grp_lasso_coeff': args.grp_lasso_coeff,
+                'ch_maps': ch_maps,
+                'arch_spec': getArchSpec(model),}
+        if delta_ckpt != None:
+            # Base checkpoint at the reconfiguration points, deltas in between
+            delta_ckpt.save(ckpt_state, epoch, links=ckpt_links, rebase=is_reconf)
+        else:
+            ckpt_writer.save(ckpt_state, filename='checkpoint.pth.tar', links=ckpt_links)
+        if args.compact_checkpoint and epoch % args.save_checkpoint == 0:
+            ckpt_writer.saveCompact('checkpoint'+str(epoch)+'.ptc',
+                                    model, args.arch, 'cifar',
+                                    meta={'epoch': epoch,
+                                          'acc': test_acc,
+                                          'best_acc': best_acc,
+                                          'grp_lasso_coeff': args.grp_lasso_coeff},
+                                    ch_maps=ch_maps)
+    ckpt_writer.close()
+    events.write('end', epoch=args.epochs, best_acc=best_acc)
+    events.close()
     logger.close()
 
+    # A relaunch per interval pays the startup overhead at every interval
+    if num_intervals > 1:
+        print('[INFO] Startup overhead saved over %d intervals: %.2fs' % (num_intervals, startup_time * (num_intervals - 1)))
+
     print('Best acc:')
     print(best_acc)
 
 
-def train(trainloader, model, criterion, optimizer, epoch, use_cuda):
+def train(trainloader, model, criterion, optimizer, regularizer, epoch, use_cuda):
     # switch to train mode
     model.train()
 
@@ -299,47 +437,50 @@ def train(trainloader, model, criterion, optimizer, epoch, use_cuda):
         # lasso penalty
         init_batch = batch_idx == 0 and epoch == 1
 
-        if args.en_group_lasso:
-            if args.global_group_lasso:
-                lasso_penalty = get_group_lasso_global(model, args.arch)
-            else:
-                lasso_penalty = get_group_lasso_group(model, args.arch)
+        # Proximal mode: the penalty is computed only to auto-tune the coefficient
+        if args.en_group_lasso and (args.lasso_mode == 'penalty' or init_batch):
+            with torch.set_grad_enabled(args.lasso_mode == 'penalty'):
+                lasso_penalty = regularizer()
 
             # Auto-tune the group-lasso coefficient @first training iteration
-            coeff_dir = os.path.join(args.coeff_container, 'cifar', args.arch)
+            # The coefficient is kept in args and stored in the checkpoints
             if init_batch:
-                args.grp_lasso_coeff = args.var_group_lasso_coeff *loss.item() / (lasso_penalty * (1-args.var_group_lasso_coeff))
-                grp_lasso_coeff = torch.autograd.Variable(args.grp_lasso_coeff)
+                args.grp_lasso_coeff = args.var_group_lasso_coeff *loss.item() / (lasso_penalty.item() * (1-args.var_group_lasso_coeff))
 
-                if not os.path.exists( coeff_dir ):
-                    os.makedirs( coeff_dir )
-                with open( os.path.join(coeff_dir, str(args.var_group_lasso_coeff)), 'w' ) as f_coeff:
-                    f_coeff.write( str(grp_lasso_coeff.item()) )
+                # Optional export
+                if args.coeff_container != None:
+                    coeff_dir = os.path.join(args.coeff_container, 'cifar', args.arch)
+                    if not os.path.exists( coeff_dir ):
+                        os.makedirs( coeff_dir )
+                    with open( os.path.join(coeff_dir, str(args.var_group_lasso_coeff)), 'w' ) as f_coeff:
+                        f_coeff.write( str(args.grp_lasso_coeff) )
 
-            else:
-                with open( os.path.join(coeff_dir, str(args.var_group_lasso_coeff)), 'r' ) as f_coeff:
-                    for line in f_coeff:
-                        grp_lasso_coeff = float(line)
-
-            lasso_penalty = lasso_penalty * grp_lasso_coeff
+            lasso_penalty = lasso_penalty * args.grp_lasso_coeff
         else:
             lasso_penalty = 0.
 
         # Group lasso calcution is not performance-optimized => Ignore from execution time
-        loss += lasso_penalty
+        if args.lasso_mode == 'penalty':
+            loss += lasso_penalty
 
         # measure accuracy and record loss
         prec1, prec5 = accuracy(outputs.data, targets.data, topk=(1, 5))
         losses.update(loss.item(), inputs.size(0))
         top1.update(prec1.item(), inputs.size(0))
         top5.update(prec5.item(), inputs.size(0))
-        lasso_ratio.update(lasso_penalty / loss.item(), inputs.size(0))
+        if args.lasso_mode == 'penalty':
+            lasso_ratio.update(lasso_penalty / loss.item(), inputs.size(0))
 
         # compute gradient and do SGD step
         optimizer.zero_grad()
         loss.backward()
         optimizer.step()
 
+        # Proximal step: group soft-thresholding with the step size of the current LR
+        if args.en_group_lasso and args.lasso_mode == 'proximal':
+            lasso_penalty = regularizer.prox(state['lr'] * args.grp_lasso_coeff).item() * args.grp_lasso_coeff
+            lasso_ratio.update(lasso_penalty / (loss.item() + lasso_penalty), inputs.size(0))
+
         # measure elapsed time
         batch_time.update(time.time() - end - data_load_time)
         end = time.time()
@@ -397,11 +538,17 @@ def test(testloader, model, criterion, epoch, use_cuda):
     epoch_time = batch_time.avg * len(testloader)   # Time for total test dataset
     return (losses.avg, top1.avg, epoch_time)
 
-def save_checkpoint(state, is_best, checkpoint='checkpoint', filename='checkpoint.pth.tar'):
-    filepath = os.path.join(checkpoint, filename)
-    torch.save(state, filepath)
-    if is_best:
-        shutil.copyfile(filepath, os.path.join(checkpoint, 'model_best.pth.tar'))
+""" Weight shape of each (conv, FC) layer: layer name >> [out_chs, in_chs(, fil_height, fil_width)]
+"""
+def layer_shapes(model):
+    return dict((name.split('module.')[-1].rsplit('.', 1)[0], list(param.shape))
+                for name, param in model.named_parameters()
+                if ('conv' in name or 'fc' in name) and 'weight' in name)
+
+""" Number of output channels of the conv layers
+"""
+def num_conv_chs(model):
+    return sum(shape[0] for name, shape in layer_shapes(model).items() if 'conv' in name)
 
 def adjust_learning_rate(optimizer, epoch):
     global state
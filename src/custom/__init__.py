@@ -1,3 +1,8 @@
-from .checkpoint_utils import _makeSparse, _genDenseModel, _getConvStructSparsity
+from .checkpoint_utils import _makeSparse, _genDenseModel, _getConvStructSparsity, _applyArchSpec
 from .custom_parallel import CustomDataParallel as _DataParallel
-from .group_lasso_regs import get_group_lasso_global, get_group_lasso_group
\ No newline at end of file
+from .group_lasso_regs import get_group_lasso_global, get_group_lasso_group, GroupLassoRegularizer, LASSO_SCALES
+from .compact_checkpoint import saveCompactCheckpoint, CompactCheckpoint, updateChannelMaps, getArchSpec
+from .checkpoint_writer import AsyncCheckpointWriter
+from .delta_checkpoint import DeltaCheckpointer, loadCheckpoint
+from .cost_model import getLayerShapes, getModelCosts, getTrainingMacs
+from .latency_table import LatencyTable, getModelLatency
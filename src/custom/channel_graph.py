@@ -0,0 +1,162 @@
+"""
+ Copyright 2019 Sangkug Lym
+ Copyright 2019 The University of Texas at Austin
+
+ Licensed under the Apache License, Version 2.0 (the "License");
+ you may not use this file except in compliance with the License.
+ You may obtain a copy of the License at
+
+     http://www.apache.org/licenses/LICENSE-2.0
+
+ Unless required by applicable law or agreed to in writing, software
+ distributed under the License is distributed on an "AS IS" BASIS,
+ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ See the License for the specific language governing permissions and
+ limitations under the License.
+"""
+
+import operator
+import torch
+import torch.nn as nn
+import torch.fx as fx
+
+from .layers import DeadLayer, ChannelMask, ChannelMerge
+
+# Channel graphs traced per architecture
+_channel_graphs = {}
+
+
+""" Tracer keeping removed layers and channel gating modules as leaf modules
+"""
+class _FlatTracer(fx.Tracer):
+    def is_leaf_module(self, m, module_qualified_name):
+        return isinstance(m, (DeadLayer, ChannelMask, ChannelMerge)) or super(_FlatTracer, self).is_leaf_module(m, module_qualified_name)
+
+
+""" Union-find of the channel spaces
+"""
+class _ChannelSpaces(object):
+    def __init__(self):
+        self.parent = []
+
+    def new(self):
+        self.parent.append(len(self.parent))
+        return len(self.parent) -1
+
+    def find(self, s):
+        while self.parent[s] != s:
+            self.parent[s] = self.parent[self.parent[s]]
+            s = self.parent[s]
+        return s
+
+    def union(self, spaces):
+        spaces = [self.find(s) for s in spaces if s != None]
+        if len(spaces) == 0:
+            return None
+        for s in spaces[1:]:
+            self.parent[s] = spaces[0]
+        return spaces[0]
+
+
+""" Trace the channel dependency of a flattened network
+# A channel space is the channel dimension of a feature map.
+# 1. Each convolution/FC layer consumes its input space and produces a new space
+# 2. Element-wise additions (residual sums) and ChannelMerge (gated residual sums)
+#    merge the spaces of their operands
+# 3. The other operations (BN, ReLU, pooling, view, ChannelMask) keep the space of their input
+
+# model: network model (Flattened, optionally wrapped in DataParallel)
+# layers: weight name >> [input space, output space] in the execution order
+"""
+def _traceChannelSpaces(model):
+    prefix = ''
+    if isinstance(model, nn.DataParallel):
+        model, prefix = model.module, 'module.'
+
+    graph = _FlatTracer().trace(model)
+    modules = dict(model.named_modules())
+    spaces = _ChannelSpaces()
+    node_space, layers = {}, []
+
+    def inSpace(args):
+        for arg in args:
+            if isinstance(arg, fx.Node) and node_space.get(arg) != None:
+                return node_space[arg]
+        return None
+
+    for node in graph.nodes:
+        if node.op == 'call_module':
+            module = modules[node.target]
+            if isinstance(module, (nn.Conv2d, nn.Linear)):
+                node_space[node] = spaces.new()
+                layers.append([prefix+node.target+'.weight', inSpace(node.args), node_space[node]])
+            elif isinstance(module, DeadLayer):
+                node_space[node] = None
+            elif isinstance(module, ChannelMerge):
+                node_space[node] = spaces.union([node_space.get(arg) for arg in list(node.args) + list(node.kwargs.values())
+                                                 if isinstance(arg, fx.Node)])
+            else:
+                node_space[node] = inSpace(node.args)
+
+        elif node.op in ['call_function', 'call_method']:
+            if node.target in [operator.add, operator.iadd, torch.add, 'add', 'add_']:
+                node_space[node] = spaces.union([node_space.get(arg) for arg in node.args
+                                                 if isinstance(arg, fx.Node)])
+            else:
+                node_space[node] = inSpace(node.args)
+
+    # Resolve the merged spaces
+    for layer in layers:
+        layer[1] = spaces.find(layer[1]) if layer[1] != None else None
+        layer[2] = spaces.find(layer[2])
+    return layers
+
+
+""" Channel dependency graph of a flattened network
+# Derived from the traced forward pass and cached per architecture
+# 1. stages: same format as the hand-written resnet_stages tables
+#    - [0, 1, ...]: shared spaces (more than one producer or consumer) >> {'i': consumer layers, 'o': producer layers}
+#    - [10]: layers of each residual path (chains through unshared spaces into a shared space)
+# 2. rm_pairs: residual paths that are removed together (same as stages[10])
+
+# model: network model
+# arch: architecture name
+"""
+def getChannelGraph(model, arch):
+    if arch in _channel_graphs:
+        return _channel_graphs[arch]
+
+    layers = _traceChannelSpaces(model)
+    producers, consumers = {}, {}
+    for name, in_space, out_space in layers:
+        producers.setdefault(out_space, []).append(name)
+        if in_space != None:
+            consumers.setdefault(in_space, []).append(name)
+
+    # Shared spaces in the order of their first producer
+    stages, shared = {}, []
+    for name, in_space, out_space in layers:
+        is_shared = len(producers[out_space]) > 1 or len(consumers.get(out_space, [])) > 1
+        if is_shared and out_space not in shared:
+            shared.append(out_space)
+            stages[len(stages)] = {'i':consumers.get(out_space, []), 'o':producers[out_space]}
+
+    # Residual paths: From a layer fed by a shared space, follow the unshared spaces
+    # with a single consumer until the path merges into a shared space
+    out_spaces = dict((name, out_space) for name, in_space, out_space in layers)
+    res_paths = []
+    for name, in_space, out_space in layers:
+        if in_space not in shared:
+            continue
+        path = [name]
+        while out_spaces[path[-1]] not in shared and len(consumers.get(out_spaces[path[-1]], [])) == 1:
+            path.append(consumers[out_spaces[path[-1]]][0])
+        if len(path) > 1 and out_spaces[path[-1]] in shared:
+            res_paths.append(path)
+
+    # Key 10 is reserved for the residual paths
+    assert len(shared) < 10, "Too many shared channel spaces in [{}]".format(arch)
+    stages[10] = res_paths
+    _channel_graphs[arch] = {'stages':stages, 'rm_pairs':[[name.split('.weight')[0] for name in path]
+                                                          for path in res_paths]}
+    return _channel_graphs[arch]
@@ -27,11 +27,14 @@ import heapq
 sys.path.append('..')
 import models.cifar as models_cifar
 import models.imagenet as models_imagenet
-from .resnet_stages import *
 from .rm_layers import getRmLayers
+from .channel_graph import getChannelGraph
+from .compact_checkpoint import CompactCheckpoint, isCompactCheckpoint
+from .delta_checkpoint import loadCheckpoint
+from .layers import DeadLayer
 
 # Packages to calculate inference cost
-from scripts.feature_size_cifar import cifar_feature_size, imagenet_feature_size
+from .cost_model import getLayerShapes, getArchLayerShapes
 
 WORD_SIZE = 4
 MFLOPS = 1000000/2
@@ -40,12 +43,21 @@ class Checkpoint():
   def __init__(self, arch, dataset, model_path, num_classes, depth=None):
     #print("{}, {}".format(models.__dict__, arch))
     self.arch = arch
-    if dataset == 'imagnet':
+
+    # Compact checkpoints are read in place (No model/optimizer reconstruction)
+    if isCompactCheckpoint(model_path):
+      self.model = CompactCheckpoint(model_path)
+      self.epoch = self.model.getEpoch()
+      return
+
+    if dataset == 'imagenet':
       self.model = models_imagenet.__dict__[arch]()
     else:
       self.model = models_cifar.__dict__[arch](num_classes=num_classes)
     self.model = torch.nn.DataParallel(self.model)
-    checkpoint = torch.load(model_path, map_location=torch.device('cpu'))
+    checkpoint = loadCheckpoint(model_path, map_location=torch.device('cpu'))
+    if 'arch_spec' in checkpoint:
+      _applyArchSpec(self.model, checkpoint['arch_spec'])
     self.model.load_state_dict(checkpoint['state_dict'])
     self.optimizer = optim.SGD(self.model.parameters(), lr=0.1, momentum=0.9, weight_decay=0.005)
     self.optimizer.load_state_dict(checkpoint['optimizer'])
@@ -85,6 +97,59 @@ def _getFilterData(model, target_lyr):
   return fil_data
 
 
+""" Structural sparsity of one (conv, FC) layer
+# The weights are reduced to the filter max-abs map with one array reduction (No per-filter loops)
+
+# name: weight name (e.g. module.conv1.weight)
+# param: weight tensor [out_chs, in_chs, fil_height, fil_width] or [out_chs, in_chs]
+# fmap: layer shapes of the architecture (cost_model.getLayerShapes)
+"""
+def _getLayerStructSparsity(name, param, threshold, fmap):
+  # Filter sparsity graph: Row(in_chs), Col(out_chs)
+  # Tensor dims = [out_chs, in_chs, fil_height, fil_width]
+  dims = list(param.shape)
+  weights = param.data.cpu().numpy()
+
+  # Filter max-abs map: Row(in_chs), Col(out_chs)
+  if len(dims) == 4:
+    filter_size = dims[2] * dims[3]
+    layer = np.absolute(weights).max(axis=(2, 3)).T
+  elif len(dims) == 2:
+    filter_size = 1
+    layer = np.absolute(weights).T
+  layer = np.ascontiguousarray(layer)
+  #channel_map = (layer > threshold).astype(np.float64)
+  channel_map = (layer > 0.).astype(np.float64)
+
+  # ratio of non_zero weights
+  num_dense_weights = np.count_nonzero(weights >= threshold)
+
+  rows = channel_map.max(axis=1) # in_channels
+  cols = channel_map.max(axis=0) # out_channels
+
+  num_dense_out_ch = float(np.count_nonzero(cols))
+  num_dense_in_ch = float(np.count_nonzero(rows))
+
+  model_size = num_dense_out_ch * num_dense_in_ch * filter_size # Add filters
+  model_size += num_dense_out_ch  # Add bias
+
+  # Calculate inference cost = (CRS)(K)(NPQ)
+  fmap_name = name.split('module.')[-1].split('.weight')[0]
+  if len(dims) == 4:
+    out_shape = fmap[fmap_name]['out_shape']
+    inf_cost = (num_dense_in_ch * dims[2] * dims[3]) * (num_dense_out_ch) * (out_shape[1] * out_shape[2])
+  elif len(dims) == 2:
+    inf_cost = (num_dense_in_ch * num_dense_out_ch)
+
+  return {'val_map':layer, 'bi_map':channel_map,
+          'in_chs':dims[1], 'out_chs':dims[0],
+          'dense_in_chs':num_dense_in_ch, 'dense_out_chs':num_dense_out_ch,
+          'in_density':num_dense_in_ch / len(rows), 'out_density':num_dense_out_ch / len(cols),
+          'num_dense_weights':num_dense_weights,
+          'weight_density':float(num_dense_weights) / weights.size,
+          'model_size':model_size, 'inf_cost':inf_cost}
+
+
 """ Return
 1. All layers' sparsity heat-map of filters (input channels / output channels)
 2. Output channel sparsity by epoch
@@ -98,95 +163,27 @@ def _getConvStructSparsity(model, threshold, file_name, arch, dataset):
   model_size = 0
   acc_inf_cost = 0
 
-  if dataset == 'imagenet':
-    fmap = imagenet_feature_size[arch]
+  # Feature map sizes: shape propagation through the model (or the base arch of a compact checkpoint)
+  if isinstance(model, nn.Module):
+    fmap = getLayerShapes(model, dataset)
   else:
-    fmap = cifar_feature_size[arch]
+    fmap = getArchLayerShapes(arch, dataset)
   
   tot_weights = 0
 
   for name, param in model.named_parameters():
     if ('weight' in name) and ('conv' in name or 'fc' in name):
-      # Filter sparsity graph: Row(in_chs), Col(out_chs)
-      # Tensor dims = [out_chs, in_chs, fil_height, fil_width]
-      layer = []
-      dims = list(param.shape)
+      lyr = _getLayerStructSparsity(name, param, threshold, fmap)
+      tot_weights += lyr['num_dense_weights']
 
-      if len(dims) == 4:
-        channel_map = np.zeros([dims[1], dims[0]])
-        filter_size = dims[2] * dims[3]
-        for in_ch in range(dims[1]):
-          fil_row = []
-          for out_ch in range(dims[0]):
-            fil = param.data.numpy()[out_ch,in_ch,:,:]
-            fil_max = np.absolute(fil).max()
-            fil_row.append(fil_max)
-            #if fil_max > threshold:
-            if fil_max > 0.:
-              channel_map[in_ch, out_ch] = 1
-          layer.append(fil_row)
-
-      elif len(dims) == 2:
-        channel_map = np.zeros([dims[1], dims[0]])
-        filter_size = 1
-        for in_ch in range(dims[1]):
-          fil_row = []
-          for out_ch in range(dims[0]):
-            fil = param.data.numpy()[out_ch,in_ch]
-            fil_max = np.absolute(fil)
-            fil_row.append(fil_max)
-            #if fil_max > threshold:
-            if fil_max > 0.:
-              channel_map[in_ch, out_ch] = 1
-          layer.append(fil_row)
-
-      # ratio of non_zero weights
-      weights = param.data.numpy()
-      weight_density = float(weights[weights >= threshold].size) / weights.size
-
-      tot_weights += weights[weights >= threshold].size
-
-      sparse_val_map[conv_id] = np.array(layer)
-      sparse_bi_map[conv_id] = channel_map
-
-      rows = channel_map.max(axis=1) # in_channels
-      cols = channel_map.max(axis=0) # out_channels
-
-#      if 'conv' in name or 'fc' in name:
-#        if file_name != None:
-#          out_file.write("\n{}:{}, ".format(name, 'i_ch'))
-#          for row in rows:
-#            out_file.write("{},".format(row))
-#          out_file.write("\n{}:{}, ".format(name, 'o_ch'))
-#          for col in cols:
-#            out_file.write("{},".format(col))
-#        else:
-#          print ("{}:{}, {}".format(name, 'i_ch', rows))
-#          print ("{}:{}, {}".format(name, 'o_ch', cols))
-
-      num_dense_out_ch = float(np.count_nonzero(cols))
-      num_dense_in_ch = float(np.count_nonzero(rows))
-
-      out_density =  num_dense_out_ch / len(cols)
-      in_density = num_dense_in_ch / len(rows)
-
-      conv_struct_density[conv_id] = {'in_ch':in_density, 'out_ch':out_density}
-      conv_rand_density[conv_id] = weight_density
-      #print("{}: {}".format(name, weight_density))
-
-      model_size += num_dense_out_ch * num_dense_in_ch * filter_size # Add filters
-      model_size += num_dense_out_ch  # Add bias
-
-      # Calculate inference cost = (CRS)(K)(NPQ)
-      fmap_name = name.split('module.')[1].split('.weight')[0]
-      if len(dims) == 4:
-        inf_cost = (num_dense_in_ch * dims[2] * dims[3]) * (num_dense_out_ch) * (fmap[fmap_name][1]**2)
-      elif len(dims) == 2:
-        inf_cost = (num_dense_in_ch * num_dense_out_ch)
-      #print("{}, {}, {}".format(fmap_name, num_dense_in_ch, num_dense_out_ch))
+      sparse_val_map[conv_id] = lyr['val_map']
+      sparse_bi_map[conv_id] = lyr['bi_map']
+      conv_struct_density[conv_id] = {'in_ch':lyr['in_density'], 'out_ch':lyr['out_density']}
+      conv_rand_density[conv_id] = lyr['weight_density']
 
+      model_size += lyr['model_size']
+      acc_inf_cost += lyr['inf_cost']
       conv_id += 1
-      acc_inf_cost += inf_cost
 
   print("tot_weights:{}".format(tot_weights))
 
@@ -199,6 +196,69 @@ def _getConvStructSparsity(model, threshold, file_name, arch, dataset):
          acc_inf_cost/MFLOPS
 
 
+"""
+Find the dense input/output channels of every (conv, FC) layer in one sweep
+- A channel is dense if any of its weights survives the threshold
+- Each weight tensor is reduced once to a filter-max map (no per-channel probing)
+- All channel masks are moved to the host with a single copy
+
+# model: network model
+# threshold: criteria to quantize weights to zero
+# arch: architecture name
+# ch_masks: {layer name: {'in_mask', 'out_mask', 'in_idx', 'out_idx'}}
+#           Boolean channel masks and dense channel indexes (CPU tensors)
+#           The input channel mask/index is None for the depth-wise convolution layers
+"""
+def _getDenseChMasks(model, threshold, arch):
+  names, masks = [], []
+
+  with torch.no_grad():
+    for name, param in model.named_parameters():
+      if (('conv' in name) or ('fc' in name)) and ('weight' in name):
+        in_mask = None
+
+        # A channel is dense if its largest weight reaches the threshold
+        # (Negative weights are regarded as zero as well)
+        if param.dim() == 4:
+          if 'conv' in name:
+            conv_dw = int(name.split('.')[1].split('conv')[1]) %2 == 0
+          else:
+            conv_dw = False
+          fil_max = param.amax(dim=[2,3])
+          if ('mobilenet' not in arch) or ('mobilenet' in arch and not conv_dw):
+            in_mask = fil_max.amax(dim=0) >= threshold
+          out_mask = fil_max.amax(dim=1) >= threshold
+
+        elif param.dim() == 2:
+          # Last FC layers (fc, fc3): Remove only the input neurons
+          in_mask = param.amax(dim=0) >= threshold
+          # FC layer in the middle remove their output neurons
+          if any(i for i in ['fc1', 'fc2'] if i in name):
+            out_mask = param.amax(dim=1) >= threshold
+          else:
+            out_mask = torch.ones(param.shape[0], dtype=torch.bool, device=param.device)
+
+        names.append(name)
+        masks.append([in_mask, out_mask])
+
+    # Single device-to-host copy of all channel masks
+    flat = [m for pair in masks for m in pair if m is not None]
+    flat = torch.cat(flat).cpu() if len(flat) > 0 else torch.zeros(0, dtype=torch.bool)
+
+  ch_masks, offset = {}, 0
+  for name, pair in zip(names, masks):
+    ch_masks[name] = {}
+    for key, m in zip(['in', 'out'], pair):
+      if m is None:
+        ch_masks[name][key+'_mask'], ch_masks[name][key+'_idx'] = None, None
+      else:
+        host_mask = flat[offset:offset + m.numel()]
+        ch_masks[name][key+'_mask'] = host_mask
+        ch_masks[name][key+'_idx'] = host_mask.nonzero().flatten()
+        offset += m.numel()
+  return ch_masks
+
+
 """
 Make only the (conv, FC) layer parameters sparse 
 - Match other layers' parameters when reconfiguring network
@@ -208,46 +268,14 @@ def _makeSparse(model, threshold, arch, threshold_type, dataset, is_gating=False
 
   print ("[INFO] Force the sparse filters to zero...")
   dense_chs, chs_temp, idx = {}, {}, 0
+  ch_masks = _getDenseChMasks(model, threshold, arch)
 
   for name, param in model.named_parameters():
-    dims = list(param.shape)
-    if (('conv' in name) or ('fc' in name)) and ('weight' in name):
+    if name in ch_masks:
+      in_idx, out_idx = ch_masks[name]['in_idx'], ch_masks[name]['out_idx']
+      dense_in_chs = [] if in_idx is None else in_idx.tolist()
+      dense_out_chs = out_idx.tolist()
 
-      with torch.no_grad():
-        param = torch.where(param < threshold, torch.tensor(0.).cuda(), param)
-
-      dense_in_chs, dense_out_chs = [], []
-      if param.dim() == 4:
-        if 'conv' in name:
-          conv_dw = int(name.split('.')[1].split('conv')[1]) %2 == 0
-        else:
-          conv_dw = False
-        # Forcing sparse input channels to zero
-        if ('mobilenet' not in arch) or ('mobilenet' in arch and not conv_dw):
-          for c in range(dims[1]):
-            if param[:,c,:,:].abs().max() > 0:
-              dense_in_chs.append(c)
-
-        # Forcing sparse output channels to zero
-        for c in range(dims[0]):
-          if param[c,:,:,:].abs().max() > 0:
-            dense_out_chs.append(c)
-
-      # Forcing input channels of FC layer to zero
-      elif param.dim() == 2:
-        # Last FC layers (fc, fc3): Remove only the input neurons
-        for c in range(dims[1]):
-          if param[:,c].abs().max() > 0:
-            dense_in_chs.append(c)
-        # FC layer in the middle remove their output neurons
-        if any(i for i in ['fc1', 'fc2'] if i in name):
-          for c in range(dims[0]):
-            if param[c,:].abs().max() > 0:
-              dense_out_chs.append(c)
-        else:
-          # [fc, fc3] output channels (class probabilities) are all dense
-          dense_out_chs = [c for c in range(dims[0])]
-      
       chs_temp[idx] = {'name':name, 'in_chs':dense_in_chs, 'out_chs':dense_out_chs}
       idx += 1
       dense_chs[name] = {'in_chs':dense_in_chs, 'out_chs':dense_out_chs, 'idx':idx}
@@ -272,10 +300,8 @@ def _makeSparse(model, threshold, arch, threshold_type, dataset, is_gating=False
   - Individual: Add gating layers >> Layers at the shared node skip more computation
   """
   if 'resnet' in arch:
-    if 'cifar' in dataset:
-      stages, ch_maps = stages_cifar[arch], []
-    else:
-      stages, ch_maps = stages_imagenet[arch], []
+    # Shared nodes and residual paths traced from the model
+    stages, ch_maps = getChannelGraph(model, arch)['stages'], []
 
     # Within a residual branch >> Union of adjacent pairs
     adj_lyrs = stages[10]
@@ -387,14 +413,116 @@ def _makeSparse(model, threshold, arch, threshold_type, dataset, is_gating=False
     return dense_chs, None
 
 
+"""
+Rebuild the layer modules of a reconfigured model with their new channel counts
+- The parameters/buffers (and their optimizer states) are moved to the new modules
+- Module hyper-parameters (kernel, stride, padding, groups, ...) are kept
+"""
+def _rebuildModules(model):
+  for parent in list(model.modules()):
+    for child_name, child in list(parent._modules.items()):
+      if isinstance(child, nn.Conv2d):
+        out_chs, in_chs = child.weight.shape[0], child.weight.shape[1] * child.groups
+        new_lyr = nn.Conv2d(in_chs, out_chs, 
+                            kernel_size=child.kernel_size, 
+                            stride=child.stride, 
+                            padding=child.padding, 
+                            dilation=child.dilation,
+                            groups=child.groups, 
+                            bias=child.bias is not None, 
+                            padding_mode=child.padding_mode,
+                            device='meta')
+      elif isinstance(child, nn.BatchNorm2d):
+        num_chs = child.weight.shape[0] if child.affine else child.running_mean.shape[0]
+        new_lyr = nn.BatchNorm2d(num_chs, 
+                                 eps=child.eps, 
+                                 momentum=child.momentum, 
+                                 affine=child.affine, 
+                                 track_running_stats=child.track_running_stats,
+                                 device='meta')
+      elif isinstance(child, nn.Linear):
+        new_lyr = nn.Linear(child.weight.shape[1], child.weight.shape[0], 
+                            bias=child.bias is not None,
+                            device='meta')
+      else:
+        continue
+
+      # Same parameter objects => optimizer states remain valid
+      for key in child._parameters:
+        new_lyr._parameters[key] = child._parameters[key]
+      for key in child._buffers:
+        new_lyr._buffers[key] = child._buffers[key]
+      new_lyr.train(child.training)
+      parent._modules[child_name] = new_lyr
+
+
+"""
+Reshape a flattened model to the layer spec stored in a checkpoint (getArchSpec)
+- Resume a pruned run from the original model definition (No generated architecture file)
+- The parameter objects are kept, so an optimizer built on the model remains valid
+- The layers removed in the checkpoint are replaced by DeadLayer placeholders
+  and their parameters are dropped from the optimizer: the 'dead' entries (in-place runs)
+  and the conv/BN/FC layers missing from the spec (deleted by non-in-place runs)
+- The values are not set: load the state dicts after this call
+"""
+def _applyArchSpec(model, arch_spec, optimizer=None):
+  modules = dict(model.named_modules())
+  rm_params = []
+
+  def reshape(tensor, shape):
+    tensor.data = tensor.data.new_empty(shape)
+
+  for lyr in arch_spec:
+    module = modules[lyr['name']]
+    if lyr['type'] == 'dead':
+      if not isinstance(module, DeadLayer):
+        rm_params.extend(module.parameters())
+        parent, child = lyr['name'].rsplit('.', 1)
+        modules[parent]._modules[child] = DeadLayer()
+      continue
+
+    if lyr['type'] == 'conv':
+      module.groups = lyr['groups']
+      reshape(module.weight, [lyr['out_chs'], lyr['in_chs'] // lyr['groups']] + lyr['kernel_size'])
+    elif lyr['type'] == 'fc':
+      reshape(module.weight, [lyr['out_chs'], lyr['in_chs']])
+    elif lyr['type'] == 'bn':
+      for key in ['weight', 'bias', 'running_mean', 'running_var']:
+        if getattr(module, key, None) is not None:
+          reshape(getattr(module, key), [lyr['num_chs']])
+    if lyr['type'] in ['conv', 'fc'] and module.bias is not None:
+      reshape(module.bias, [lyr['out_chs']])
+
+  # Layers deleted from the model (del_param_in_flat_arch without inplace) have no entry
+  spec_names = set(lyr['name'] for lyr in arch_spec)
+  for name, module in modules.items():
+    if isinstance(module, (nn.Conv2d, nn.BatchNorm2d, nn.Linear)) and name not in spec_names:
+      rm_params.extend(module.parameters())
+      parent, child = name.rsplit('.', 1)
+      modules[parent]._modules[child] = DeadLayer()
+
+  _rebuildModules(model)
+
+  if optimizer != None and len(rm_params) > 0:
+    rm_param_ids = set(id(param) for param in rm_params)
+    for param in rm_params:
+      if param in optimizer.state:
+        del optimizer.state[param]
+    for g in optimizer.param_groups:
+      g['params'] = [param for param in g['params'] if id(param) not in rm_param_ids]
+
+
 """
 Generate a new dense network model
+- Gather the dense channels of each tensor with index_select (one pass per tensor)
 - Rearrange/remove channels from filters
 - Rearrange/remove the channels of non-convolution layers
 - Remove the dead (all zero channels) layers
 - Manage optimization/momentum/buffer parameters
+- inplace: keep training the same model object without a new architecture file
+           (Removed layers are replaced by DeadLayer placeholders)
 """
-def _genDenseModel(model, dense_chs, optimizer, arch, dataset):
+def _genDenseModel(model, dense_chs, optimizer, arch, dataset, inplace=False):
   print ("[INFO] Squeezing the sparse model to dense one...")
 
   # Sanity check
@@ -408,6 +536,14 @@ def _genDenseModel(model, dense_chs, optimizer, arch, dataset):
   #for key in optimizer.state:
   #  print("==> {}, {}, {}".format(key, type(key), optimizer.state[key]))
 
+  # Dense channel index tensors of each (conv, FC) layer
+  idx_cache = {}
+  def getIdx(w_name, key, device):
+    if (w_name, key) not in idx_cache:
+      idx_cache[(w_name, key)] = torch.tensor(sorted(dense_chs[w_name][key]),
+                                              dtype=torch.long, device=device)
+    return idx_cache[(w_name, key)]
+
   for name, param in model.named_parameters():
 
     # Get Momentum parameters to adjust
@@ -437,36 +573,25 @@ def _genDenseModel(model, dense_chs, optimizer, arch, dataset):
         rm_list.append(name)
 
       else:
-        # Generate a new dense tensor and replace (Convolution layer)
-        if len(dims) == 4:
-          new_param = Parameter(torch.Tensor(num_out_ch, num_in_ch, dims[2], dims[3])).cuda()
-          new_mom_param = Parameter(torch.Tensor(num_out_ch, num_in_ch, dims[2], dims[3])).cuda()
-
-          for in_idx, in_ch in enumerate(sorted(dense_in_ch_idxs)):
-            for out_idx, out_ch in enumerate(sorted(dense_out_ch_idxs)):
-              with torch.no_grad():
-                new_param[out_idx,in_idx,:,:] = param[out_ch,in_ch,:,:]
-                new_mom_param[out_idx,in_idx,:,:] = mom_param[out_ch,in_ch,:,:]
-
-        # Generate a new dense tensor and replace (FC layer)
-        elif len(dims) == 2:
-          new_param = Parameter(torch.Tensor(num_out_ch, num_in_ch)).cuda()
-          new_mom_param = Parameter(torch.Tensor(num_out_ch, num_in_ch)).cuda()
-
-          if ('fc1' in name) or ('fc2' in name):
-            for in_idx, in_ch in enumerate(sorted(dense_in_ch_idxs)):
-              for out_idx, out_ch in enumerate(sorted(dense_out_ch_idxs)):
-                with torch.no_grad():
-                  new_param[out_idx,in_idx] = param[out_ch,in_ch]
-                  new_mom_param[out_idx,in_idx] = mom_param[out_ch,in_ch]
-          else:
-            for in_idx, in_ch in enumerate(sorted(dense_in_ch_idxs)):
-              with torch.no_grad():
-                new_param[:,in_idx] = param[:,in_ch]
-                new_mom_param[:,in_idx] = mom_param[:,in_ch]
+        assert len(dims) in [2, 4], "Wrong tensor dimension: {} at layer {}".format(dims, name)
+
+        if 'mobilenet' in arch and conv_dw:
+          in_idx = torch.zeros(1, dtype=torch.long, device=param.device)
+        else:
+          in_idx = getIdx(name, 'in_chs', param.device)
+
+        # Gather the dense filters (Convolution layer, FC layer in the middle)
+        # [fc, fc3] output channels (class probabilities) are all dense
+        if len(dims) == 4 or ('fc1' in name) or ('fc2' in name):
+          out_idx = getIdx(name, 'out_chs', param.device)
+          with torch.no_grad():
+            new_param = param.data.index_select(0, out_idx).index_select(1, in_idx)
+            new_mom_param = mom_param.data.index_select(0, out_idx).index_select(1, in_idx)
         else:
-          assert True, "Wrong tensor dimension: {} at layer {}".format(dims, name)
-        
+          with torch.no_grad():
+            new_param = param.data.index_select(1, in_idx)
+            new_mom_param = mom_param.data.index_select(1, in_idx)
+
         param.data = new_param
         optimizer.state[param]['momentum_buffer'].data = new_mom_param
 
@@ -475,16 +600,11 @@ def _genDenseModel(model, dense_chs, optimizer, arch, dataset):
     # Change parameters of non-neural computing layers (BN, biases)
     else:
       w_name = name.replace('bias', 'weight').replace('bn', 'conv')
-      dense_out_ch_idxs = dense_chs[w_name]['out_chs']
-      num_out_ch = len(dense_out_ch_idxs)
-
-      new_param = Parameter(torch.Tensor(num_out_ch)).cuda()
-      new_mom_param = Parameter(torch.Tensor(num_out_ch)).cuda()
+      out_idx = getIdx(w_name, 'out_chs', param.device)
 
-      for out_idx, out_ch in enumerate(sorted(dense_out_ch_idxs)):
-        with torch.no_grad():
-          new_param[out_idx] = param[out_ch]
-          new_mom_param[out_idx] = mom_param[out_ch]
+      with torch.no_grad():
+        new_param = param.data.index_select(0, out_idx)
+        new_mom_param = mom_param.data.index_select(0, out_idx)
 
       param.data = new_param
       optimizer.state[param]['momentum_buffer'].data = new_mom_param
@@ -495,68 +615,42 @@ def _genDenseModel(model, dense_chs, optimizer, arch, dataset):
   for name, buf in model.named_buffers():
     if 'running_mean' in name or 'running_var' in name:
       w_name = name.replace('bn', 'conv').split('running')[0]+'weight'
-      dense_out_ch_idxs = dense_chs[w_name]['out_chs']
-      num_out_ch = len(dense_out_ch_idxs)
-      new_buf = Parameter(torch.Tensor(num_out_ch)).cuda()
-
-      for out_idx, out_ch in enumerate(sorted(dense_out_ch_idxs)):
-        with torch.no_grad():
-          new_buf[out_idx] = buf[out_ch]
-      buf.data = new_buf
+      out_idx = getIdx(w_name, 'out_chs', buf.device)
+      buf.data = buf.data.index_select(0, out_idx)
 
   """
   Remove layers (Only applicable to ResNet-like networks)
   - Remove model parameters
   - Remove parameters/states in optimizer
   """
-  def getLayerIdx(lyr_name):
-    if 'conv' in lyr_name:
-      conv_id = dense_chs[lyr_name+'.weight']['idx']
-      return [3 * (conv_id - 1)], [lyr_name+'.weight']
-    elif 'bn' in lyr_name:
-      conv_name = lyr_name.replace('bn', 'conv')
-      conv_id = dense_chs[conv_name+'.weight']['idx']
-      return [3 * conv_id -1, 3 * conv_id -2], [lyr_name+'.bias', lyr_name+'.weight']
-
   if len(rm_list) > 0:
     rm_lyrs = []
     for name in rm_list:
-      rm_lyr = getRmLayers(name, arch, dataset)
+      rm_lyr = getRmLayers(name, arch, dataset, model)
       if any(i for i in rm_lyr if i not in rm_lyrs):
         rm_lyrs.extend(rm_lyr)
-    
-    # Remove model parameters
-    for rm_lyr in rm_lyrs:
-      model.del_param_in_flat_arch(rm_lyr)
 
-    idxs, rm_params = [], []
+    # Parameters of the removed layers (Collect before the layers are detached)
+    rm_params = [param for name, param in model.named_parameters()
+                 if name.rsplit('.', 1)[0] in rm_lyrs]
+    rm_param_ids = set(id(param) for param in rm_params)
+
+    # Remove model parameters
     for rm_lyr in rm_lyrs:
-      idx, rm_param = getLayerIdx(rm_lyr)
-      idxs.extend(idx)
-      rm_params.extend(rm_param)
+      model.del_param_in_flat_arch(rm_lyr, inplace)
 
     # Remove optimizer states
-    for name, param in model.named_parameters():
-      for rm_param in rm_params:
-        if name == rm_param:
-          del optimizer.state[param]
-
-    # Sanity check: Print out optimizer parameters before change
-    #print ("[INFO] ==== Size of parameter group (Before)")
-    #for g in optimizer.param_groups:
-    #  for idx, g2 in enumerate(g['params']):
-    #    print("idx:{}, param_shape:{}".format(idx, list(g2.shape)))
-    
+    for param in rm_params:
+      if param in optimizer.state:
+        del optimizer.state[param]
+
     # Remove optimizer parameters
-    # Adjuster: Absolute parameter location changes after each removal
-    for idx_adjuster, idx in enumerate(sorted(idxs)):
-      del optimizer.param_groups[0]['params'][idx - idx_adjuster]
-
-    # Sanity check => Print out optimizer parameters after change
-    #print ("[INFO] ==== Size of parameter group (After)")
-    #for g in optimizer.param_groups:
-    #  for idx, g2 in enumerate(g['params']):
-    #    print("idx:{}, param_shape:{}".format(idx, list(g2.shape)))
+    for g in optimizer.param_groups:
+      g['params'] = [param for param in g['params'] if id(param) not in rm_param_ids]
+
+  # Rebuild the layer modules with the new channel counts
+  if inplace:
+    _rebuildModules(model)
 
   # Sanity check => Check the changed parameters
   #for name, param in model.named_parameters():
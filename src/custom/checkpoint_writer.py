@@ -0,0 +1,127 @@
+"""
+ Copyright 2019 Sangkug Lym
+ Copyright 2019 The University of Texas at Austin
+
+ Licensed under the Apache License, Version 2.0 (the "License");
+ you may not use this file except in compliance with the License.
+ You may obtain a copy of the License at
+
+     http://www.apache.org/licenses/LICENSE-2.0
+
+ Unless required by applicable law or agreed to in writing, software
+ distributed under the License is distributed on an "AS IS" BASIS,
+ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ See the License for the specific language governing permissions and
+ limitations under the License.
+"""
+
+import os
+import queue
+import shutil
+import threading
+
+import torch
+
+from .compact_checkpoint import getArchSpec, writeCompactCheckpoint
+
+
+""" CPU snapshot of a checkpoint state
+# Tensors (parameters, momentum buffers) are copied, containers are rebuilt,
+# so that training can keep updating the model while the snapshot is written
+"""
+def _snapshot(obj):
+  if torch.is_tensor(obj):
+    return obj.detach().to('cpu', copy=True)
+  elif isinstance(obj, dict):
+    return obj.__class__((k, _snapshot(v)) for k, v in obj.items())
+  elif isinstance(obj, (list, tuple)):
+    return obj.__class__(_snapshot(v) for v in obj)
+  return obj
+
+
+""" Link dst to the file at src (Atomic replacement of dst)
+# Hardlink when the file system supports it, otherwise a copy
+# The next checkpoint replaces src with a new file, so the old links keep their contents
+"""
+def _link(src, dst):
+  tmp = dst + '.tmp'
+  if os.path.lexists(tmp):
+    os.remove(tmp)
+  try:
+    os.link(src, tmp)
+  except OSError:
+    shutil.copyfile(src, tmp)
+  os.replace(tmp, dst)
+
+
+""" Checkpoint writer running off the training thread
+# 1. save() takes a CPU snapshot of the state and queues it
+# 2. The writer thread serializes each snapshot once into a temporary file and renames it
+# 3. The periodic and best checkpoints are links of the serialized file
+# At most max_pending snapshots are queued: save() only blocks when the disk
+# falls behind by more than that.
+"""
+class AsyncCheckpointWriter():
+  def __init__(self, checkpoint_dir, max_pending=2):
+    self.checkpoint_dir = checkpoint_dir
+    self.error = None
+    self.jobs = queue.Queue(maxsize=max_pending)
+    self.thread = threading.Thread(target=self._run, daemon=True)
+    self.thread.start()
+
+  def _run(self):
+    while True:
+      job = self.jobs.get()
+      try:
+        if job is None:
+          return
+        job()
+      except Exception as e:
+        self.error = e
+      finally:
+        self.jobs.task_done()
+
+  def _put(self, job):
+    if self.error is not None:
+      raise RuntimeError("Checkpoint writer failed") from self.error
+    self.jobs.put(job)
+
+  """ Queue a torch.save checkpoint
+  # filename: checkpoint file, links: names of the copies of the same checkpoint
+  # snapshot: False if the state is already a CPU copy that is not updated anymore
+  """
+  def save(self, state, filename='checkpoint.pth.tar', links=[], snapshot=True):
+    if snapshot:
+      state = _snapshot(state)
+    path = os.path.join(self.checkpoint_dir, filename)
+    links = [os.path.join(self.checkpoint_dir, link) for link in links]
+
+    def job():
+      torch.save(state, path + '.tmp')
+      os.replace(path + '.tmp', path)
+      for link in links:
+        _link(path, link)
+    self._put(job)
+
+  """ Queue a compact (memory-mapped) checkpoint of the model
+  """
+  def saveCompact(self, filename, model, arch, dataset, meta=None, ch_maps=None):
+    state_dict = _snapshot(model.state_dict())
+    param_names = [name for name, _ in model.named_parameters()]
+    arch_spec = getArchSpec(model)
+    meta, ch_maps = _snapshot(meta), _snapshot(ch_maps)
+    path = os.path.join(self.checkpoint_dir, filename)
+    self._put(lambda: writeCompactCheckpoint(path, state_dict, param_names, arch_spec,
+                                             arch, dataset, meta, ch_maps))
+
+  """ Wait until every queued checkpoint is on disk
+  """
+  def flush(self):
+    self.jobs.join()
+    if self.error is not None:
+      raise RuntimeError("Checkpoint writer failed") from self.error
+
+  def close(self):
+    self.flush()
+    self.jobs.put(None)
+    self.thread.join()
@@ -0,0 +1,199 @@
+"""
+ Copyright 2019 Sangkug Lym
+ Copyright 2019 The University of Texas at Austin
+
+ Licensed under the Apache License, Version 2.0 (the "License");
+ you may not use this file except in compliance with the License.
+ You may obtain a copy of the License at
+
+     http://www.apache.org/licenses/LICENSE-2.0
+
+ Unless required by applicable law or agreed to in writing, software
+ distributed under the License is distributed on an "AS IS" BASIS,
+ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ See the License for the specific language governing permissions and
+ limitations under the License.
+"""
+
+import os
+import json
+import mmap
+import struct
+from collections import OrderedDict
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from .layers import DeadLayer
+
+""" Compact pruned-checkpoint format
+# [magic (8B)][header size (8B, little endian)][JSON header][padding][tensor data]
+# 1. The JSON header holds the metadata (arch, dataset, epoch, accuracy), the
+#    architecture spec, the dense channel maps and the offset/shape/dtype of each tensor
+# 2. The tensors are stored contiguously (C order) and aligned to ALIGN bytes from
+#    the data start, so that each one is a zero-copy view of the memory-mapped file
+"""
+MAGIC = b'PTCKPT01'
+ALIGN = 64
+
+_DTYPES = {'float32':(torch.float32, np.float32),
+           'float16':(torch.float16, np.float16),
+           'float64':(torch.float64, np.float64),
+           'int64':(torch.int64, np.int64),
+           'int32':(torch.int32, np.int32),
+           'uint8':(torch.uint8, np.uint8),
+           'bool':(torch.bool, np.bool_)}
+
+
+def _align(size):
+  return (size + ALIGN -1) // ALIGN * ALIGN
+
+
+""" Layer definitions of a (reconfigured) flattened model
+# One entry per Conv2d, BatchNorm2d, Linear and removed (DeadLayer) module in definition order
+# The channel counts come from the parameter/buffer shapes: without in-place reconfiguration,
+# _genDenseModel squeezes the tensors but keeps the modules (Stale in/out_channels attributes)
+"""
+def getArchSpec(model):
+  spec = []
+  for name, m in model.named_modules():
+    if isinstance(m, nn.Conv2d):
+      spec.append({'name':name, 'type':'conv',
+                   'in_chs':m.weight.shape[1] * m.groups, 'out_chs':m.weight.shape[0],
+                   'kernel_size':list(m.kernel_size), 'stride':list(m.stride),
+                   'padding':list(m.padding), 'groups':m.groups, 'bias':m.bias is not None})
+    elif isinstance(m, nn.BatchNorm2d):
+      num_chs = m.weight.shape[0] if m.affine else m.running_mean.shape[0]
+      spec.append({'name':name, 'type':'bn', 'num_chs':num_chs})
+    elif isinstance(m, nn.Linear):
+      spec.append({'name':name, 'type':'fc',
+                   'in_chs':m.weight.shape[1], 'out_chs':m.weight.shape[0], 'bias':m.bias is not None})
+    elif isinstance(m, DeadLayer):
+      spec.append({'name':name, 'type':'dead'})
+  return spec
+
+
+""" Compose the dense channel maps with the dense channels of a reconfiguration
+# ch_maps: weight name >> {'in_chs', 'out_chs'}: channel indexes of the original (unpruned) layer
+#          A missing layer/list means the channels are not squeezed yet (identity)
+# dense_chs: dense channels returned by _makeSparse (indexes of the current layer)
+"""
+def updateChannelMaps(ch_maps, dense_chs):
+  for name, chs in dense_chs.items():
+    ch_map = ch_maps.setdefault(name, {'in_chs':[], 'out_chs':[]})
+    for key in ['in_chs', 'out_chs']:
+      # Depth-wise convolution layers have no input channel map
+      if len(chs[key]) == 0 and len(ch_map[key]) == 0:
+        continue
+      if len(ch_map[key]) == 0:
+        ch_map[key] = sorted(chs[key])
+      else:
+        ch_map[key] = [ch_map[key][c] for c in sorted(chs[key])]
+  return ch_maps
+
+
+""" Store the model in the compact checkpoint format
+# meta: JSON-serializable metadata (epoch, acc, best_acc, ...)
+"""
+def saveCompactCheckpoint(path, model, arch, dataset, meta=None, ch_maps=None):
+  param_names = [name for name, _ in model.named_parameters()]
+  writeCompactCheckpoint(path, model.state_dict(), param_names, getArchSpec(model),
+                         arch, dataset, meta, ch_maps)
+
+
+""" Write a state dict in the compact checkpoint format
+# The file is written next to the target and renamed at the end (No partial checkpoints)
+# Split from saveCompactCheckpoint so that a CPU snapshot can be written off the training thread
+"""
+def writeCompactCheckpoint(path, state_dict, param_names, arch_spec, arch, dataset, meta=None, ch_maps=None):
+  param_names = set(param_names)
+  tensors, entries, offset = [], OrderedDict(), 0
+  for name, t in state_dict.items():
+    t = t.detach().cpu().contiguous()
+    dtype = str(t.dtype).split('.')[1]
+    assert dtype in _DTYPES, "Unsupported dtype [{}] of [{}]".format(dtype, name)
+    nbytes = t.numel() * t.element_size()
+    entries[name] = {'dtype':dtype, 'shape':list(t.shape), 'offset':offset,
+                     'param':name in param_names}
+    tensors.append(t)
+    offset = _align(offset + nbytes)
+
+  header = {'arch':arch, 'dataset':dataset, 'meta':meta or {},
+            'arch_spec':arch_spec, 'ch_maps':ch_maps or {}, 'tensors':entries}
+  header = json.dumps(header).encode('utf-8')
+  data_start = _align(len(MAGIC) + 8 + len(header))
+
+  tmp_path = path + '.tmp'
+  with open(tmp_path, 'wb') as f:
+    f.write(MAGIC + struct.pack('<Q', len(header)) + header)
+    for (name, entry), t in zip(entries.items(), tensors):
+      f.seek(data_start + entry['offset'])
+      f.write(memoryview(t.numpy()).cast('B'))
+  os.replace(tmp_path, path)
+
+
+def isCompactCheckpoint(path):
+  with open(path, 'rb') as f:
+    return f.read(len(MAGIC)) == MAGIC
+
+
+""" Memory-mapped reader of a compact checkpoint
+# Only the header is parsed on open. Each tensor is a view of the mapped file,
+# so reading the metadata or one layer costs only the pages of that data.
+# The mapping is copy-on-write: in-place updates of a tensor never reach the file.
+"""
+class CompactCheckpoint():
+  def __init__(self, path):
+    self.path = path
+    with open(path, 'rb') as f:
+      magic = f.read(len(MAGIC))
+      assert magic == MAGIC, "[{}] is not a compact checkpoint".format(path)
+      header_size = struct.unpack('<Q', f.read(8))[0]
+      self.header = json.loads(f.read(header_size).decode('utf-8'))
+      self._data_start = _align(len(MAGIC) + 8 + header_size)
+      self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+  @property
+  def arch(self):
+    return self.header['arch']
+
+  @property
+  def meta(self):
+    return self.header['meta']
+
+  @property
+  def arch_spec(self):
+    return self.header['arch_spec']
+
+  @property
+  def ch_maps(self):
+    return self.header['ch_maps']
+
+  def getEpoch(self):
+    return self.header['meta'].get('epoch')
+
+  def names(self):
+    return list(self.header['tensors'].keys())
+
+  def tensor(self, name):
+    entry = self.header['tensors'][name]
+    torch_dtype, np_dtype = _DTYPES[entry['dtype']]
+    count = int(np.prod(entry['shape']))
+    if entry['dtype'] == 'bool':
+      np_dtype = np.uint8
+    data = np.frombuffer(self._mmap, dtype=np_dtype, count=count,
+                         offset=self._data_start + entry['offset'])
+    t = torch.from_numpy(data).view(entry['shape'])
+    return t.bool() if entry['dtype'] == 'bool' else t
+
+  def named_parameters(self):
+    for name, entry in self.header['tensors'].items():
+      if entry['param']:
+        yield name, self.tensor(name)
+
+  def state_dict(self):
+    return OrderedDict((name, self.tensor(name)) for name in self.header['tensors'])
+
+  def close(self):
+    self._mmap.close()
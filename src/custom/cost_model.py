@@ -0,0 +1,162 @@
+"""
+ Copyright 2019 Sangkug Lym
+ Copyright 2019 The University of Texas at Austin
+
+ Licensed under the Apache License, Version 2.0 (the "License");
+ you may not use this file except in compliance with the License.
+ You may obtain a copy of the License at
+
+     http://www.apache.org/licenses/LICENSE-2.0
+
+ Unless required by applicable law or agreed to in writing, software
+ distributed under the License is distributed on an "AS IS" BASIS,
+ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ See the License for the specific language governing permissions and
+ limitations under the License.
+"""
+
+import functools
+import contextlib
+from collections import OrderedDict
+
+import torch
+import torch.nn as nn
+
+try:
+  from torch.func import functional_call
+except ImportError:
+  from torch.nn.utils.stateless import functional_call
+
+import models.cifar as models_cifar
+import models.imagenet as models_imagenet
+
+""" Shape-propagation cost model
+# 1. A forward pass on the meta device (shapes only: no data, no compute) records the
+#    input/output shape of every Conv2d, Linear and BatchNorm2d layer of a model
+# 2. The per-layer costs follow from the weight shape and the output feature map size
+# Removed (DeadLayer) layers are not called by the forward pass and have no entry.
+"""
+INPUT_SIZE = {'cifar':32, 'imagenet':224}
+WORD_SIZE = 4
+
+# The batch of the shape-only forward pass (Batch statistics of the BN layers need > 1 sample)
+_BATCH = 2
+
+
+""" Input/output shape of each layer from a meta-device forward pass
+# Return: layer name >> {'type': conv/fc/bn, 'in_shape': [C, H, W] ([C] for FC),
+#                        'out_shape': [K, P, Q] ([K] for FC), 'weight_shape',
+#                        'first': True if the layer reads the network input (No DGRAD),
+#                        conv: 'stride', 'padding', 'groups'}
+# The model (and its parameters) are not modified
+"""
+def getLayerShapes(model, dataset):
+  if isinstance(model, nn.DataParallel):
+    model = model.module
+
+  size = INPUT_SIZE[dataset]
+  x = torch.empty((_BATCH, 3, size, size), device='meta')
+  shapes, hooks = OrderedDict(), []
+
+  def record(name, lyr_type):
+    def hook(module, inputs, output):
+      shapes[name] = {'type':lyr_type,
+                      'in_shape':list(inputs[0].shape[1:]),
+                      'out_shape':list(output.shape[1:]),
+                      'weight_shape':None if module.weight is None else list(module.weight.shape),
+                      'first':inputs[0] is x}
+      if lyr_type == 'conv':
+        shapes[name].update({'stride':list(module.stride), 'padding':list(module.padding),
+                             'groups':module.groups})
+    return hook
+
+  for name, m in model.named_modules():
+    for lyr_type, cls in [('conv', nn.Conv2d), ('fc', nn.Linear), ('bn', nn.BatchNorm2d)]:
+      if isinstance(m, cls):
+        hooks.append(m.register_forward_hook(record(name, lyr_type)))
+
+  tensors = dict((name, torch.empty_like(t, device='meta'))
+                 for name, t in list(model.named_parameters()) + list(model.named_buffers()))
+  try:
+    with torch.no_grad():
+      functional_call(model, tensors, (x,))
+  finally:
+    for hook in hooks:
+      hook.remove()
+  return shapes
+
+
+""" Layer shapes of an (unpruned) model of the model zoo
+# Feature map sizes do not change with channel pruning, so this also serves the
+# pruned checkpoints of the same arch
+# The model is built on the meta device when supported (No weight allocation/initialization)
+"""
+@functools.lru_cache(maxsize=None)
+def getArchLayerShapes(arch, dataset):
+  models = models_imagenet if dataset == 'imagenet' else models_cifar
+  assert arch in models.__dict__, "Unknown {} model [{}]".format(dataset, arch)
+  device = torch.device('meta') if hasattr(torch.device, '__enter__') else contextlib.nullcontext()
+  with device:
+    model = models.__dict__[arch]()
+  return getLayerShapes(model, dataset)
+
+
+""" Per-sample costs of a (conv, FC) layer
+# weight_shape: [out_chs, in_chs/groups, fil_height, fil_width] or [out_chs, in_chs]
+# lyr_shape: entry of getLayerShapes (None for FC layers without a recorded shape)
+
+# fwd = (CRS)(K)(PQ): MACs; WGRAD and DGRAD take as many MACs as the forward pass
+#       (The input layer computes no DGRAD)
+# bn: memory accesses of the BN layer on the output = (3 x KPQ) + (5 x KPQ)
+# act: output activations, params: weight and bias/BN-shift bytes
+"""
+def getLayerCost(weight_shape, lyr_shape=None, batch=1, word_size=WORD_SIZE):
+  k, c = weight_shape[0], weight_shape[1]
+  if len(weight_shape) == 4:
+    r, s = weight_shape[2], weight_shape[3]
+    pq = lyr_shape['out_shape'][1] * lyr_shape['out_shape'][2]
+    fwd = (c * r * s) * k * pq
+    bn = 8 * k * pq
+    act = k * pq
+    num_params = c * r * s * k + k
+  else:
+    fwd = c * k
+    bn = 0
+    act = k
+    num_params = c * k + k
+
+  first = lyr_shape is not None and lyr_shape['first']
+  return {'fwd':batch * fwd, 'wgrad':batch * fwd, 'dgrad':0 if first else batch * fwd,
+          'bn':batch * bn, 'act':batch * act, 'params':num_params * word_size}
+
+
+""" Per-layer costs of a (pruned) model
+# Return: layer name >> getLayerCost + 'in_shape'/'out_shape'
+# The BN traffic is taken from the BN layers of the model (0 for a conv without BN)
+"""
+def getModelCosts(model, dataset, batch=1, word_size=WORD_SIZE):
+  shapes = getLayerShapes(model, dataset)
+  costs = OrderedDict()
+  for name, shape in shapes.items():
+    if shape['type'] == 'bn':
+      continue
+    cost = getLayerCost(shape['weight_shape'], shape, batch, word_size)
+    cost['bn'] = 0
+    cost['in_shape'], cost['out_shape'] = shape['in_shape'], shape['out_shape']
+    costs[name] = cost
+
+  # Each BN layer is charged to the layer it normalizes (the last conv before it)
+  last = None
+  for name, shape in shapes.items():
+    if shape['type'] == 'conv':
+      last = name
+    elif shape['type'] == 'bn' and last is not None:
+      pq = shape['out_shape'][1] * shape['out_shape'][2]
+      costs[last]['bn'] += batch * 8 * shape['out_shape'][0] * pq
+  return costs
+
+
+""" Per-sample training cost (Forward + WGRAD + DGRAD MACs) of a (pruned) model
+"""
+def getTrainingMacs(model, dataset):
+  return sum(cost['fwd'] + cost['wgrad'] + cost['dgrad'] for cost in getModelCosts(model, dataset).values())
@@ -16,6 +16,7 @@
 """
 
 import torch.nn as nn
+from .layers import DeadLayer
 
 class CustomDataParallel(nn.DataParallel):  
     def __init__(self, module, device_ids=None, output_device=None, dim=0):
@@ -23,11 +24,15 @@ class CustomDataParallel(nn.DataParallel):
 
     """ Remove sparsified module parameter from the network model
     # rm_name: name of module to remove
+    # inplace: replace the module with a DeadLayer to keep the flattened forward() valid
     """
-    def del_param_in_flat_arch(self, rm_name):
+    def del_param_in_flat_arch(self, rm_name, inplace=False):
         # We remove an entire layer holding the delete target parameters
         rm_module = rm_name.split('.')
         module  = self._modules[rm_module[0]]
         if module._modules[rm_module[1]] != None:
             print("[INFO] Removing parameters/buffers in module [{}]".format(rm_module[0]+'.'+rm_module[1]))
-            del module._modules[rm_module[1]]
\ No newline at end of file
+            if inplace:
+                module._modules[rm_module[1]] = DeadLayer()
+            else:
+                del module._modules[rm_module[1]]
\ No newline at end of file
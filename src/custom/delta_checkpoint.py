@@ -0,0 +1,158 @@
+"""
+ Copyright 2019 Sangkug Lym
+ Copyright 2019 The University of Texas at Austin
+
+ Licensed under the Apache License, Version 2.0 (the "License");
+ you may not use this file except in compliance with the License.
+ You may obtain a copy of the License at
+
+     http://www.apache.org/licenses/LICENSE-2.0
+
+ Unless required by applicable law or agreed to in writing, software
+ distributed under the License is distributed on an "AS IS" BASIS,
+ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ See the License for the specific language governing permissions and
+ limitations under the License.
+"""
+
+import os
+import torch
+
+""" Incremental (delta) checkpoints
+# 1. A full base checkpoint is written at each reconfiguration point (and after a resume)
+# 2. The other epochs store each tensor of the state relative to the base:
+#    - same: unchanged tensor (not stored)
+#    - full: new shape/dtype or integer tensor (stored as is)
+#    - exact: bitwise XOR with the base (lossless)
+#    - fp16/int8: difference from the base (int8: symmetric per-tensor scale)
+# A delta refers to its base by file name, so any epoch is rebuilt from two files.
+"""
+DELTA_MODES = ['exact', 'fp16', 'int8']
+
+# Integer views of the floating point tensors (Bitwise XOR)
+_INT_VIEWS = {2:torch.int16, 4:torch.int32, 8:torch.int64}
+
+# Placeholder of a tensor in the state skeleton of a delta checkpoint
+_TENSOR = '__delta_tensor__'
+
+
+""" Tensors of a nested checkpoint state: key path (tuple) >> tensor
+"""
+def _flatten(obj, path=(), out=None):
+  out = {} if out is None else out
+  if torch.is_tensor(obj):
+    out[path] = obj
+  elif isinstance(obj, dict):
+    for k, v in obj.items():
+      _flatten(v, path + (k,), out)
+  elif isinstance(obj, (list, tuple)):
+    for i, v in enumerate(obj):
+      _flatten(v, path + (i,), out)
+  return out
+
+
+""" Checkpoint state with the tensors replaced by placeholders
+"""
+def _skeleton(obj):
+  if torch.is_tensor(obj):
+    return _TENSOR
+  elif isinstance(obj, dict):
+    return obj.__class__((k, _skeleton(v)) for k, v in obj.items())
+  elif isinstance(obj, (list, tuple)):
+    return obj.__class__(_skeleton(v) for v in obj)
+  return obj
+
+
+""" Put the tensors back into a state skeleton
+"""
+def _fill(obj, tensors, path=()):
+  if isinstance(obj, str) and obj == _TENSOR:
+    return tensors[path]
+  elif isinstance(obj, dict):
+    return obj.__class__((k, _fill(v, tensors, path + (k,))) for k, v in obj.items())
+  elif isinstance(obj, (list, tuple)):
+    return obj.__class__(_fill(v, tensors, path + (i,)) for i, v in enumerate(obj))
+  return obj
+
+
+def _encode(t, base, mode):
+  if base is None or base.shape != t.shape or base.dtype != t.dtype:
+    return {'mode':'full', 'data':t}
+  if torch.equal(t, base):
+    return {'mode':'same'}
+  if not t.is_floating_point():
+    return {'mode':'full', 'data':t}
+
+  if mode == 'exact':
+    bits = _INT_VIEWS[t.element_size()]
+    return {'mode':'exact', 'data':t.view(bits) ^ base.view(bits)}
+
+  diff = t - base
+  if mode == 'fp16':
+    diff = diff.half()
+    # Out of the fp16 range
+    if not torch.isfinite(diff).all():
+      return {'mode':'full', 'data':t}
+    return {'mode':'fp16', 'data':diff}
+  else:
+    scale = diff.abs().max().item() / 127.
+    return {'mode':'int8', 'data':torch.round(diff / scale).clamp_(-127, 127).to(torch.int8),
+            'scale':scale}
+
+
+def _decode(enc, base):
+  if enc['mode'] == 'same':
+    return base
+  elif enc['mode'] == 'full':
+    return enc['data']
+  elif enc['mode'] == 'exact':
+    return (base.view(enc['data'].dtype) ^ enc['data']).view(base.dtype)
+  elif enc['mode'] == 'int8':
+    return base + enc['data'].to(base.dtype) * enc['scale']
+  return base + enc['data'].to(base.dtype)
+
+
+""" Load a regular or delta checkpoint
+# A delta checkpoint is rebuilt from the base checkpoint stored in the same directory
+"""
+def loadCheckpoint(path, map_location=None):
+  checkpoint = torch.load(path, map_location=map_location)
+  if not (isinstance(checkpoint, dict) and 'delta_base' in checkpoint):
+    return checkpoint
+
+  base = torch.load(os.path.join(os.path.dirname(path), checkpoint['delta_base']),
+                    map_location=map_location)
+  base = _flatten(base)
+  tensors = dict((key, _decode(enc, base.get(key))) for key, enc in checkpoint['tensors'].items())
+  return _fill(checkpoint['skeleton'], tensors)
+
+
+""" Delta checkpoint writer (On top of AsyncCheckpointWriter)
+# The CPU snapshot of the last base is kept in host memory to compute the deltas
+# mode: exact (lossless), fp16 or int8 (lossy) differences
+"""
+class DeltaCheckpointer():
+  def __init__(self, writer, mode='exact'):
+    assert mode in DELTA_MODES, "Unknown delta checkpoint mode [{}]".format(mode)
+    self.writer = writer
+    self.mode = mode
+    self.base = None
+    self.base_name = None
+
+  """ Store the checkpoint of an epoch as checkpoint.pth.tar
+  # links: names of the copies of the same checkpoint (interval/best checkpoints)
+  # rebase: write a full base checkpoint (reconfiguration point)
+  """
+  def save(self, state, epoch, links=[], rebase=False):
+    tensors = dict((key, t.detach().to('cpu', copy=True)) for key, t in _flatten(state).items())
+    if rebase or self.base is None:
+      self.base, self.base_name = tensors, 'checkpoint_base'+str(epoch)+'.tar'
+      self.writer.save(_fill(_skeleton(state), tensors), filename=self.base_name,
+                       links=['checkpoint.pth.tar'] + links, snapshot=False)
+      return
+
+    delta = {'delta_base':self.base_name,
+             'skeleton':_skeleton(state),
+             'tensors':dict((key, _encode(t, self.base.get(key), self.mode))
+                            for key, t in tensors.items())}
+    self.writer.save(delta, filename='checkpoint.pth.tar', links=links, snapshot=False)
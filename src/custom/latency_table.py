@@ -0,0 +1,198 @@
+"""
+ Copyright 2019 Sangkug Lym
+ Copyright 2019 The University of Texas at Austin
+
+ Licensed under the Apache License, Version 2.0 (the "License");
+ you may not use this file except in compliance with the License.
+ You may obtain a copy of the License at
+
+     http://www.apache.org/licenses/LICENSE-2.0
+
+ Unless required by applicable law or agreed to in writing, software
+ distributed under the License is distributed on an "AS IS" BASIS,
+ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ See the License for the specific language governing permissions and
+ limitations under the License.
+"""
+
+import os
+import json
+import time
+import bisect
+import platform
+from collections import OrderedDict
+
+import torch
+import torch.nn as nn
+
+from .cost_model import getLayerShapes
+
+""" Measured per-layer CPU latency lookup table
+# 1. Layers are grouped by geometry (type, feature map size, filter, stride, padding, batch):
+#    the signature of a layer without its channel counts
+# 2. Each geometry holds the measured forward+backward latency (ms) on a grid of
+#    (in_chs, out_chs) points. Depth-wise conv and BN layers have one channel count.
+# 3. Channel counts between the grid points are interpolated (Bilinear), the ones
+#    out of the grid are scaled proportionally from the nearest grid point
+"""
+DEFAULT_RATIOS = [1., 0.75, 0.5, 0.25, 0.125]
+
+
+""" Geometry signature of a layer
+# weight_shape, lyr_shape: as in cost_model.getLayerCost
+# Return: (signature, in_chs, out_chs), in_chs == out_chs for 1-D (depth-wise conv, BN) geometries
+"""
+def getLayerSignature(weight_shape, lyr_shape, batch):
+  if lyr_shape['type'] == 'bn':
+    hw = lyr_shape['out_shape'][1:]
+    return 'bn-{}x{}-n{}'.format(hw[0], hw[1], batch), weight_shape[0], weight_shape[0]
+  elif lyr_shape['type'] == 'fc':
+    return 'fc-n{}'.format(batch), weight_shape[1], weight_shape[0]
+
+  # Depth-wise: one input channel per group (The group count follows the channels when pruned)
+  depthwise = lyr_shape['groups'] > 1 and weight_shape[1] == 1
+  hw = lyr_shape['in_shape'][1:]
+  sig = 'conv-{}x{}-f{}x{}-s{}-p{}-dw{}-n{}'.format(hw[0], hw[1], weight_shape[2], weight_shape[3],
+                                                    lyr_shape['stride'][0], lyr_shape['padding'][0],
+                                                    int(depthwise), batch)
+  in_chs = weight_shape[0] if depthwise else weight_shape[1]
+  return sig, in_chs, weight_shape[0]
+
+
+""" Layer and input of one grid point (Channel counts in_chs/out_chs)
+"""
+def _buildLayer(weight_shape, lyr_shape, in_chs, out_chs, batch):
+  if lyr_shape['type'] == 'bn':
+    hw = lyr_shape['out_shape'][1:]
+    return nn.BatchNorm2d(out_chs), torch.randn(batch, out_chs, hw[0], hw[1])
+  elif lyr_shape['type'] == 'fc':
+    return nn.Linear(in_chs, out_chs), torch.randn(batch, in_chs)
+
+  depthwise = lyr_shape['groups'] > 1 and weight_shape[1] == 1
+  hw = lyr_shape['in_shape'][1:]
+  layer = nn.Conv2d(in_chs, out_chs, weight_shape[2:], stride=lyr_shape['stride'],
+                    padding=lyr_shape['padding'], groups=out_chs if depthwise else 1, bias=False)
+  return layer, torch.randn(batch, in_chs, hw[0], hw[1])
+
+
+""" Median forward+backward latency (ms) of a layer
+"""
+def _timeLayer(layer, x, iters, warmup):
+  x.requires_grad_(True)
+  grad = torch.ones_like(layer(x))
+  times = []
+  for i in range(warmup + iters):
+    start = time.perf_counter()
+    layer(x).backward(grad)
+    if i >= warmup:
+      times.append((time.perf_counter() - start) * 1000.)
+    layer.zero_grad()
+    x.grad = None
+  times.sort()
+  return times[len(times) //2]
+
+
+""" Grid weights of x: [(grid point, weight)]
+"""
+def _interp(points, x):
+  if x <= points[0]:
+    return [(points[0], float(x) / points[0])]
+  if x >= points[-1]:
+    return [(points[-1], float(x) / points[-1])]
+  idx = bisect.bisect_left(points, x)
+  if points[idx] == x:
+    return [(x, 1.)]
+  lo, hi = points[idx -1], points[idx]
+  t = float(x - lo) / (hi - lo)
+  return [(lo, 1. - t), (hi, t)]
+
+
+class LatencyTable():
+  """ path: JSON cache of the table (Loaded if it exists)
+  # batch, iters, warmup: measurement setup of new tables
+  """
+  def __init__(self, path=None, batch=32, iters=10, warmup=3):
+    self.path = path
+    self.iters, self.warmup = iters, warmup
+    self.meta = {'batch':batch, 'threads':torch.get_num_threads(),
+                 'cpu':platform.processor() or platform.machine(), 'torch':torch.__version__}
+    self.layers = {}
+    if path is not None and os.path.exists(path):
+      with open(path, 'r') as f:
+        table = json.load(f)
+      self.meta, self.layers = table['meta'], table['layers']
+
+  @property
+  def batch(self):
+    return self.meta['batch']
+
+  def save(self, path=None):
+    path = path or self.path
+    with open(path + '.tmp', 'w') as f:
+      json.dump({'meta':self.meta, 'layers':self.layers}, f, indent=1, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+  """ Measure the grid points of one layer
+  # ratios: channel counts of the grid = ratios of the layer channels
+  # The input channels of the first layer (image channels) are not pruned
+  """
+  def profileLayer(self, weight_shape, lyr_shape, ratios=DEFAULT_RATIOS):
+    sig, in_chs, out_chs = getLayerSignature(weight_shape, lyr_shape, self.batch)
+    grid = self.layers.setdefault(sig, {})
+    out_grid = sorted(set(max(1, int(round(out_chs * r))) for r in ratios))
+    if sig.startswith('bn-') or '-dw1-' in sig:
+      points = [(chs, chs) for chs in out_grid]
+    else:
+      in_grid = [in_chs] if lyr_shape['first'] else sorted(set(max(1, int(round(in_chs * r))) for r in ratios))
+      points = [(c, k) for c in in_grid for k in out_grid]
+
+    for c, k in points:
+      key = '{},{}'.format(c, k)
+      if key not in grid:
+        layer, x = _buildLayer(weight_shape, lyr_shape, c, k, self.batch)
+        grid[key] = _timeLayer(layer, x, self.iters, self.warmup)
+    return sig
+
+  """ Measure the grid points of every conv/BN/FC layer of a model
+  """
+  def profileModel(self, model, dataset, ratios=DEFAULT_RATIOS, verbose=True):
+    for name, shape in getLayerShapes(model, dataset).items():
+      start = time.time()
+      sig = self.profileLayer(shape['weight_shape'], shape, ratios)
+      if verbose:
+        print("[INFO] {}: {} ({:.1f}s)".format(name, sig, time.time() - start))
+
+  """ Predicted forward+backward latency (ms) of a layer (None: geometry not profiled)
+  """
+  def predict(self, weight_shape, lyr_shape):
+    sig, in_chs, out_chs = getLayerSignature(weight_shape, lyr_shape, self.batch)
+    if len(self.layers.get(sig, {})) == 0:
+      return None
+    if '{},{}'.format(in_chs, out_chs) in self.layers[sig]:
+      return self.layers[sig]['{},{}'.format(in_chs, out_chs)]
+    grid = dict((tuple(int(i) for i in key.split(',')), ms) for key, ms in self.layers[sig].items())
+
+    # 1-D geometries: the grid is the diagonal
+    if all(c == k for c, k in grid):
+      return sum(grid[(chs, chs)] * w for chs, w in _interp(sorted(c for c, _ in grid), out_chs))
+
+    in_grid = sorted(set(c for c, _ in grid))
+    out_grid = sorted(set(k for _, k in grid))
+    try:
+      return sum(grid[(c, k)] * w_c * w_k
+                 for c, w_c in _interp(in_grid, in_chs)
+                 for k, w_k in _interp(out_grid, out_chs))
+    except KeyError:
+      # Grids of several layers sharing a geometry: nearest point, scaled by the channel product
+      c, k = min(grid, key=lambda p: abs(p[0] - in_chs) + abs(p[1] - out_chs))
+      return grid[(c, k)] * float(in_chs * out_chs) / (c * k)
+
+
+""" Predicted forward+backward latency (ms) of each conv/BN/FC layer of a (pruned) model
+# Return: total (ms), layer name >> ms (None: geometry not profiled)
+"""
+def getModelLatency(model, dataset, table):
+  latency = OrderedDict()
+  for name, shape in getLayerShapes(model, dataset).items():
+    latency[name] = table.predict(shape['weight_shape'], shape)
+  return sum(ms for ms in latency.values() if ms is not None), latency
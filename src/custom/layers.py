@@ -0,0 +1,66 @@
+"""
+ Copyright 2019 Sangkug Lym
+ Copyright 2019 The University of Texas at Austin
+
+ Licensed under the Apache License, Version 2.0 (the "License");
+ you may not use this file except in compliance with the License.
+ You may obtain a copy of the License at
+
+     http://www.apache.org/licenses/LICENSE-2.0
+
+ Unless required by applicable law or agreed to in writing, software
+ distributed under the License is distributed on an "AS IS" BASIS,
+ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ See the License for the specific language governing permissions and
+ limitations under the License.
+"""
+
+import torch
+import torch.nn as nn
+
+""" Placeholder of a layer removed by in-place reconfiguration
+# The flattened forward() still calls the removed layers of a residual path.
+# Returning a scalar zero makes the residual sum (_x + x) fall back to the shortcut.
+"""
+class DeadLayer(nn.Module):
+  def __init__(self):
+    super(DeadLayer, self).__init__()
+
+  def forward(self, x):
+    return x.new_zeros(())
+
+
+""" Input channel gating of a layer on a shared node
+# Gathers the dense input channels of the layer from the shared node channels
+# indices: position of each dense input channel in the shared node
+"""
+class ChannelMask(nn.Module):
+  def __init__(self, indices):
+    super(ChannelMask, self).__init__()
+    # Rebuilt from the generated model file: not stored in checkpoints
+    self.register_buffer('indices', torch.tensor(indices, dtype=torch.long), persistent=False)
+
+  def forward(self, x):
+    return x.index_select(1, self.indices)
+
+
+""" Output channel gating of a layer on a shared node
+# Places the output channels of the layer at their positions in the shared node
+# 1. With a residual input, the channels are added to the residual (Merge and sum in one index_add)
+# 2. Otherwise, the channels are copied into a zero-initialized shared node tensor
+
+# indices: position of each output channel in the shared node
+# num_chs: number of channels of the shared node
+"""
+class ChannelMerge(nn.Module):
+  def __init__(self, indices, num_chs):
+    super(ChannelMerge, self).__init__()
+    self.num_chs = num_chs
+    # Rebuilt from the generated model file: not stored in checkpoints
+    self.register_buffer('indices', torch.tensor(indices, dtype=torch.long), persistent=False)
+
+  def forward(self, x, residual=None):
+    if residual is not None:
+      return residual.index_add(1, self.indices, x)
+    out = x.new_zeros((x.size(0), self.num_chs) + x.shape[2:])
+    return out.index_copy_(1, self.indices, x)
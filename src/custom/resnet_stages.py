@@ -16,6 +16,9 @@
 """
 
 
+# Hand-written reference tables
+# The pruning pipeline derives the same tables from the model with channel_graph.getChannelGraph
+
 """ Module name constructor
 # Model naming for each layer. Layer is assumed to be flattened.
 """
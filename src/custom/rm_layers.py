@@ -15,6 +15,10 @@
  limitations under the License.
 """
 
+from .channel_graph import getChannelGraph
+
+# Hand-written residual paths (Used when no model is given to getRmLayers)
+
 # ResNet for CIFAR10/100
 resnet20 = []
 for i in [2,4,6,8,11,13,15,18,20]:
@@ -51,23 +55,27 @@ rm_pairs_imgnet = {
 
 """ Convolution layers in each residual path
 # When a convolution layer is removed, all layers in the residual path are removed
+# The residual paths are traced from the model (Hand-written tables are used without a model)
 
 # arch: network model name
 # dataset: dataset name
+# model: network model
 # rm_layers: name of layers to remove
 """
-def getRmLayers(name, arch, dataset):
+def getRmLayers(name, arch, dataset, model=None):
     name = name.split('.weight')[0]
     rm_layers = None
 
-    if 'cifar' in dataset:
+    if model != None:
+        layer_pairs = getChannelGraph(model, arch)['rm_pairs']
+    elif 'cifar' in dataset:
         layer_pairs = rm_pairs_cifar[arch]
     else:
         layer_pairs = rm_pairs_imgnet[arch]
 
     for layer_pair in layer_pairs:
         if name in layer_pair:
-            rm_layers = layer_pair
+            rm_layers = list(layer_pair)
             break
 
     if rm_layers != None:
@@ -25,6 +25,7 @@ class layerUtil():
   def setModel(cls, model, dense_chs):
     cls.model = model
     cls.dense_chs = dense_chs
+    cls.gates = []
 
   @classmethod
   def getLayerDef(cls, arch):
@@ -124,10 +125,9 @@ class layerUtil():
           ctx += cls.forward('relu')
           ctx += cls.forward(conv3)
           ctx += cls.forward(bn3)
-          ctx += cls.merge(conv3, chs_map)
+          ctx += cls.merge(conv3, chs_map, res='_x', o='_x')
         else:
-          ctx += cls.merge(conv2, chs_map)
-        ctx += cls.sum()
+          ctx += cls.merge(conv2, chs_map, res='_x', o='_x')
         ctx += cls.forward('relu', i='_x', o='_x')
 
       else:
@@ -171,9 +171,6 @@ class layerUtil():
           ctx1 += cls.forward('relu')
           ctx1 += cls.forward(conv3)
           ctx1 += cls.forward(bn3)
-          ctx1 += cls.merge(conv3, chs_map2)
-        else:
-          ctx1 += cls.merge(conv2, chs_map2)
 
       else:
         ctx1 = cls.forward(conv1, i='_x')
@@ -195,14 +192,17 @@ class layerUtil():
       ctx2 = cls.mask(conv_short, chs_map1, i='_x', o='_x')
       ctx2 += cls.forward(conv_short, i='_x', o='_x')
       ctx2 += cls.forward(bn_short, i='_x', o='_x')
-      ctx2 += cls.empty_ch(i='_x')
       ctx2 += cls.merge(conv_short, chs_map2, i='_x', o='_x')
     else:
       ctx2 = cls.forward(conv_short, i='_x', o='_x')
       ctx2 += cls.forward(bn_short, i='_x', o='_x')
 
     ctx3 = ctx1 + ctx2
-    ctx3 += '' if no_res else cls.sum() 
+    if is_gating and not no_res:
+      # Merge the residual path into the shortcut
+      ctx3 += cls.merge(conv3 if lyr4 != None else conv2, chs_map2, res='_x', o='_x')
+    else:
+      ctx3 += '' if no_res else cls.sum() 
     ctx3 += cls.forward('relu', i='_x', o='_x')
     return ctx3
 
@@ -229,34 +229,36 @@ class layerUtil():
   def dropoutLayer(cls):                                                                  
     return '\t\tself.dropout = nn.Dropout()\n'
 
+  """ Gather the dense input channels of a layer from a shared node
+  # The indices are stored in a ChannelMask module (Defined by gatingLayerDef)
+  """
   @classmethod
   def mask(cls, layer, chs_map, i='x', o='x'):
-    indices = []
     # Get index to the dense channels
-    for ich in cls.dense_chs[cls.n(layer)]['in_chs']:
-      indices.append(chs_map[ich])
+    indices = [chs_map[ich] for ich in sorted(cls.dense_chs[cls.n(layer)]['in_chs'])]
 
-    ctx = "\t\t{} = torch.index_select({}, 1, torch.tensor({}).cuda())\n".format(
-          o, i, indices)
-    return ctx
+    name = 'mask_'+layer
+    cls.gates.append('\t\tself.{} = ChannelMask({})\n'.format(name, indices))
+    return '\t\t{} = self.{}({})\n'.format(o, name, i)
 
+  """ Place the output channels of a layer on a shared node
+  # res: residual tensor to add the channels to (Merge and sum in a single step)
+  """
   @classmethod
-  def empty_ch(cls, i='x', o='__x'):
-    return '\t\t{} = torch.full([{}.size()[0], {}.size()[2], {}.size()[3]], 0).cuda()\n'.format(
-                      o, i, i, i)
+  def merge(cls, layer, chs_map, i='x', o='x', res=None):
+    indices = [chs_map[och] for och in sorted(cls.dense_chs[cls.n(layer)]['out_chs'])]
 
+    name = 'merge_'+layer
+    cls.gates.append('\t\tself.{} = ChannelMerge({}, {})\n'.format(name, indices, len(chs_map)))
+    if res != None:
+      return '\t\t{} = self.{}({}, {})\n'.format(o, name, i, res)
+    return '\t\t{} = self.{}({})\n'.format(o, name, i)
+
+  """ Definitions of the gating layers used in the generated forward pass
+  """
   @classmethod
-  def merge(cls, layer, chs_map, i='x', o='x'):
-    stack = '\t\t{} =torch.stack(['.format(o)
-    idx = 0
-    for och in sorted(chs_map):
-      if och in cls.dense_chs[cls.n(layer)]['out_chs']:
-        stack += '{}[:,{},:,:], '.format(i, idx)
-        idx +=1
-      else:
-        stack += '__x, '
-    stack += '], dim=1)\n'
-    return stack
+  def gatingLayerDef(cls):
+    return ''.join(cls.gates)
 
   @classmethod
   def forward(cls, name, i='x', o='x'):
@@ -175,8 +175,10 @@ def _genDenseArchMobileNet(model, out_f_dir1, out_f_dir2, arch_name, dense_chs,
       os.makedirs(out_f_dir2)
 
   print ("[INFO] Generating a new dense architecture...")
-  f_out1 = open(os.path.join(out_f_dir1, 'mobilenet.py'),'w')
-  f_out1.write(ctx)
+  # Skip overwriting the model source in the in-place reconfiguration mode
+  if out_f_dir1 != None:
+    f_out1 = open(os.path.join(out_f_dir1, 'mobilenet.py'),'w')
+    f_out1.write(ctx)
   f_out2 = open(os.path.join(out_f_dir2, arch_name),'w')
   f_out2.write(ctx)
 
@@ -54,6 +54,7 @@ def _genDenseArchResNet32(model, out_f_dir1, out_f_dir2, arch_name, dense_chs, c
     ctx += lyr.getLayerDef(arch[idx])
 
   # Architecture sequential
+  init_end = len(ctx)
   ctx += '\tdef forward(self, x):\n'
   ctx += lyr.forward('conv1')
   ctx += lyr.forward('bn1')
@@ -63,7 +64,6 @@ def _genDenseArchResNet32(model, out_f_dir1, out_f_dir2, arch_name, dense_chs, c
   else:               chs_map0, chs_map1, chs_map2 = None, None, None
 
   if is_gating:
-    ctx += lyr.empty_ch(i='_x')
     ctx += lyr.merge('conv1', chs_map0, i='_x', o='_x')
 
   ctx += lyr.resnet_module(chs_map0, is_gating, 2,3) #1
@@ -92,6 +92,11 @@ def _genDenseArchResNet32(model, out_f_dir1, out_f_dir2, arch_name, dense_chs, c
   ctx += lyr.forward('fc')
   ctx += '\t\treturn x\n'
 
+  # Gating layers (Collected while generating the forward pass)
+  if is_gating:
+    ctx = ctx[:init_end] + lyr.gatingLayerDef() + ctx[init_end:]
+    ctx = 'from custom.layers import ChannelMask, ChannelMerge\n' + ctx
+
   # ResNet32 definition
   ctx += 'def resnet32_flat(**kwargs):\n'
   ctx += '\tmodel = ResNet32(**kwargs)\n'
@@ -101,7 +106,9 @@ def _genDenseArchResNet32(model, out_f_dir1, out_f_dir2, arch_name, dense_chs, c
       os.makedirs(out_f_dir2)
 
   print ("[INFO] Generating a new dense architecture...")
-  f_out1 = open(os.path.join(out_f_dir1, 'resnet32_flat.py'),'w')
-  f_out1.write(ctx)
+  # Skip overwriting the model source in the in-place reconfiguration mode
+  if out_f_dir1 != None:
+    f_out1 = open(os.path.join(out_f_dir1, 'resnet32_flat.py'),'w')
+    f_out1.write(ctx)
   f_out2 = open(os.path.join(out_f_dir2, arch_name),'w')
   f_out2.write(ctx)
@@ -61,6 +61,7 @@ def _genDenseArchResNet50(model, out_f_dir1, out_f_dir2, arch_name, dense_chs, c
     ctx += lyr.getLayerDef(arch[idx])
 
   # Architecture sequential
+  init_end = len(ctx)
   ctx += '\tdef forward(self, x):\n'
   ctx += lyr.forward('conv1')
   ctx += lyr.forward('bn1')
@@ -73,7 +74,6 @@ def _genDenseArchResNet50(model, out_f_dir1, out_f_dir2, arch_name, dense_chs, c
     chs_map0, chs_map1, chs_map2, chs_map3, chs_map4 = None, None, None, None, None
 
   if is_gating:
-    ctx += lyr.empty_ch(i='_x')
     ctx += lyr.merge('conv1', chs_map0, i='_x', o='_x')
 
   ctx += lyr.resnet_module_pool(chs_map0, chs_map1, is_gating, 2,3,4,5) #1
@@ -97,13 +97,18 @@ def _genDenseArchResNet50(model, out_f_dir1, out_f_dir2, arch_name, dense_chs, c
   ctx += lyr.resnet_module(chs_map4, is_gating, 51,52,53) #19
 
   if is_gating:
-    ctx += lyr.mask('fc', chs_map2, i='_x', o='_x')
+    ctx += lyr.mask('fc', chs_map4, i='_x', o='_x')
 
   ctx += '\t\tx = self.avgpool(_x)\n'
   ctx += '\t\tx = x.view(x.size(0), -1)\n'
   ctx += lyr.forward('fc')
   ctx += '\t\treturn x\n'
 
+  # Gating layers (Collected while generating the forward pass)
+  if is_gating:
+    ctx = ctx[:init_end] + lyr.gatingLayerDef() + ctx[init_end:]
+    ctx = 'from custom.layers import ChannelMask, ChannelMerge\n' + ctx
+
   # ResNet50 definition
   ctx += 'def resnet50_flat(**kwargs):\n'
   ctx += '\tmodel = ResNet50(**kwargs)\n'
@@ -113,7 +118,9 @@ def _genDenseArchResNet50(model, out_f_dir1, out_f_dir2, arch_name, dense_chs, c
       os.makedirs(out_f_dir2)
 
   print ("[INFO] Generating a new dense architecture...")
-  f_out1 = open(os.path.join(out_f_dir1, 'resnet50_flat.py'),'w')
-  f_out1.write(ctx)
+  # Skip overwriting the model source in the in-place reconfiguration mode
+  if out_f_dir1 != None:
+    f_out1 = open(os.path.join(out_f_dir1, 'resnet50_flat.py'),'w')
+    f_out1.write(ctx)
   f_out2 = open(os.path.join(out_f_dir2, arch_name),'w')
   f_out2.write(ctx)
@@ -58,53 +58,59 @@ def _genDenseArchResNet50BT(model, out_f_dir1, out_f_dir2, arch_name, dense_chs,
     ctx += lyr.getLayerDef(arch[idx])
 
   # Architecture sequential
+  init_end = len(ctx)
   ctx += '\tdef forward(self, x):\n'
   ctx += lyr.forward('conv1')
   ctx += lyr.forward('bn1')
   ctx += lyr.forward('relu', o='_x')
 
-  if chs_map != None: chs_map0, chs_map1, chs_map2 = chs_map[0], chs_map[1], chs_map[2]
-  else:               chs_map0, chs_map1, chs_map2 = None, None, None
+  # Shared nodes: [stem, stage1, stage2, stage3]
+  if chs_map != None: chs_map0, chs_map1, chs_map2, chs_map3 = chs_map[0], chs_map[1], chs_map[2], chs_map[3]
+  else:               chs_map0, chs_map1, chs_map2, chs_map3 = None, None, None, None
 
   if is_gating:
-    ctx += lyr.empty_ch(i='_x')
     ctx += lyr.merge('conv1', chs_map0, i='_x', o='_x')
 
   ctx += lyr.resnet_module_pool(chs_map0, chs_map1, is_gating, 2,3,4,5) #1
-  ctx += lyr.resnet_module(chs_map0, is_gating, 6,7,8) #2
-  ctx += lyr.resnet_module(chs_map0, is_gating, 9,10,11) #3
-  ctx += lyr.resnet_module(chs_map0, is_gating, 12,13,14) #4
-  ctx += lyr.resnet_module(chs_map0, is_gating, 15,16,17) #5
-  ctx += lyr.resnet_module(chs_map0, is_gating, 18,19,20) #6
-  ctx += lyr.resnet_module(chs_map0, is_gating, 21,22,23) #7
-  ctx += lyr.resnet_module(chs_map0, is_gating, 24,25,26) #8
-
-  ctx += lyr.resnet_module_pool(chs_map0, chs_map1, is_gating, 27,28,29,30) #9
-  ctx += lyr.resnet_module(chs_map1, is_gating, 31,32,33) #10
-  ctx += lyr.resnet_module(chs_map1, is_gating, 34,35,36) #11
-  ctx += lyr.resnet_module(chs_map1, is_gating, 37,38,39) #12
-  ctx += lyr.resnet_module(chs_map1, is_gating, 40,41,42) #13
-  ctx += lyr.resnet_module(chs_map1, is_gating, 43,44,45) #14
-  ctx += lyr.resnet_module(chs_map1, is_gating, 46,47,48) #15
-  ctx += lyr.resnet_module(chs_map1, is_gating, 49,50,51) #16
-
-  ctx += lyr.resnet_module_pool(chs_map1, chs_map2, is_gating, 52,53,54,55) #17
-  ctx += lyr.resnet_module(chs_map2, is_gating, 56,57,58) #18
-  ctx += lyr.resnet_module(chs_map2, is_gating, 59,60,61) #19
-  ctx += lyr.resnet_module(chs_map2, is_gating, 62,63,64) #20
-  ctx += lyr.resnet_module(chs_map2, is_gating, 65,66,67) #21
-  ctx += lyr.resnet_module(chs_map2, is_gating, 68,69,70) #22
-  ctx += lyr.resnet_module(chs_map2, is_gating, 71,72,73) #23
-  ctx += lyr.resnet_module(chs_map2, is_gating, 74,75,76) #24
+  ctx += lyr.resnet_module(chs_map1, is_gating, 6,7,8) #2
+  ctx += lyr.resnet_module(chs_map1, is_gating, 9,10,11) #3
+  ctx += lyr.resnet_module(chs_map1, is_gating, 12,13,14) #4
+  ctx += lyr.resnet_module(chs_map1, is_gating, 15,16,17) #5
+  ctx += lyr.resnet_module(chs_map1, is_gating, 18,19,20) #6
+  ctx += lyr.resnet_module(chs_map1, is_gating, 21,22,23) #7
+  ctx += lyr.resnet_module(chs_map1, is_gating, 24,25,26) #8
+
+  ctx += lyr.resnet_module_pool(chs_map1, chs_map2, is_gating, 27,28,29,30) #9
+  ctx += lyr.resnet_module(chs_map2, is_gating, 31,32,33) #10
+  ctx += lyr.resnet_module(chs_map2, is_gating, 34,35,36) #11
+  ctx += lyr.resnet_module(chs_map2, is_gating, 37,38,39) #12
+  ctx += lyr.resnet_module(chs_map2, is_gating, 40,41,42) #13
+  ctx += lyr.resnet_module(chs_map2, is_gating, 43,44,45) #14
+  ctx += lyr.resnet_module(chs_map2, is_gating, 46,47,48) #15
+  ctx += lyr.resnet_module(chs_map2, is_gating, 49,50,51) #16
+
+  ctx += lyr.resnet_module_pool(chs_map2, chs_map3, is_gating, 52,53,54,55) #17
+  ctx += lyr.resnet_module(chs_map3, is_gating, 56,57,58) #18
+  ctx += lyr.resnet_module(chs_map3, is_gating, 59,60,61) #19
+  ctx += lyr.resnet_module(chs_map3, is_gating, 62,63,64) #20
+  ctx += lyr.resnet_module(chs_map3, is_gating, 65,66,67) #21
+  ctx += lyr.resnet_module(chs_map3, is_gating, 68,69,70) #22
+  ctx += lyr.resnet_module(chs_map3, is_gating, 71,72,73) #23
+  ctx += lyr.resnet_module(chs_map3, is_gating, 74,75,76) #24
 
   if is_gating:
-    ctx += lyr.mask('fc', chs_map2, i='_x', o='_x')
+    ctx += lyr.mask('fc', chs_map3, i='_x', o='_x')
 
   ctx += '\t\tx = self.avgpool(_x)\n'
   ctx += '\t\tx = x.view(x.size(0), -1)\n'
   ctx += lyr.forward('fc')
   ctx += '\t\treturn x\n'
 
+  # Gating layers (Collected while generating the forward pass)
+  if is_gating:
+    ctx = ctx[:init_end] + lyr.gatingLayerDef() + ctx[init_end:]
+    ctx = 'from custom.layers import ChannelMask, ChannelMerge\n' + ctx
+
   # ResNet50BT definition
   ctx += 'def resnet50_bt_flat(**kwargs):\n'
   ctx += '\tmodel = ResNet50BT(**kwargs)\n'
@@ -114,7 +120,9 @@ def _genDenseArchResNet50BT(model, out_f_dir1, out_f_dir2, arch_name, dense_chs,
       os.makedirs(out_f_dir2)
 
   print ("[INFO] Generating a new dense architecture...")
-  f_out1 = open(os.path.join(out_f_dir1, 'resnet50_bt_flat.py'),'w')
-  f_out1.write(ctx)
+  # Skip overwriting the model source in the in-place reconfiguration mode
+  if out_f_dir1 != None:
+    f_out1 = open(os.path.join(out_f_dir1, 'resnet50_bt_flat.py'),'w')
+    f_out1.write(ctx)
   f_out2 = open(os.path.join(out_f_dir2, arch_name),'w')
   f_out2.write(ctx)
@@ -83,7 +83,9 @@ def _genDenseArchVGG8BN(model, out_f_dir1, out_f_dir2, arch_name, dense_chs, chs
   if not os.path.exists(out_f_dir2):
       os.makedirs(out_f_dir2)
 
-  f_out1 = open(os.path.join(out_f_dir1, 'vgg8_bn_flat.py'),'w')
-  f_out1.write(ctx)
+  # Skip overwriting the model source in the in-place reconfiguration mode
+  if out_f_dir1 != None:
+    f_out1 = open(os.path.join(out_f_dir1, 'vgg8_bn_flat.py'),'w')
+    f_out1.write(ctx)
   f_out = open(os.path.join(out_f_dir2, arch_name),'w')
   f_out.write(ctx)
@@ -204,7 +204,7 @@ class MobileNet(nn.Module):
         x = self.relu(x)
 
         x = self.avgpool(x)
-        x = x.view(-1, 1024)
+        x = x.view(x.size(0), -1)
         x = self.fc(x)
         return x
 
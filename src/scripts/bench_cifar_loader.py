@@ -0,0 +1,82 @@
+"""
+ Copyright 2019 Sangkug Lym
+ Copyright 2019 The University of Texas at Austin
+
+ Licensed under the Apache License, Version 2.0 (the "License");
+ you may not use this file except in compliance with the License.
+ You may obtain a copy of the License at
+
+     http://www.apache.org/licenses/LICENSE-2.0
+
+ Unless required by applicable law or agreed to in writing, software
+ distributed under the License is distributed on an "AS IS" BASIS,
+ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ See the License for the specific language governing permissions and
+ limitations under the License.
+"""
+
+import os, sys
+import time
+import argparse
+
+import torch
+import torch.utils.data as data
+import torchvision.datasets as datasets
+import torchvision.transforms as transforms
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from utils.cifar_tensor import CIFAR_MEAN, CIFAR_STD, tensor_cifar_loaders
+
+parser = argparse.ArgumentParser(description='CIFAR input pipeline throughput: DataLoader vs. in-memory tensor loader')
+parser.add_argument('-d', '--dataset', default='cifar10', choices=['cifar10', 'cifar100'], type=str)
+parser.add_argument('--root', default='./dataset/data/torch', type=str, help='torchvision CIFAR directory')
+parser.add_argument('--train_batch', default=128, type=int)
+parser.add_argument('-j', '--workers', nargs='+', default=[0, 4], type=int,
+                    help='worker counts of the DataLoader pipeline')
+parser.add_argument('--device', default='cuda' if torch.cuda.is_available() else 'cpu', type=str,
+                    help='training device (the tensor loader keeps the dataset there)')
+parser.add_argument('--epochs', default=2, type=int, help='measured epochs (after one warm-up epoch)')
+args = parser.parse_args()
+
+
+""" Samples/s of the training batches delivered to the device
+"""
+def measure(loader):
+  for _ in loader:
+    pass
+  start, num = time.time(), 0
+  for _ in range(args.epochs):
+    for inputs, targets in loader:
+      inputs, targets = inputs.to(args.device), targets.to(args.device)
+      num += len(targets)
+  if args.device.startswith('cuda'):
+    torch.cuda.synchronize()
+  return num / (time.time() - start)
+
+
+def main():
+  dataset = datasets.CIFAR10 if args.dataset == 'cifar10' else datasets.CIFAR100
+  transform_train = transforms.Compose([
+    transforms.RandomCrop(32, padding=4),
+    transforms.RandomHorizontalFlip(),
+    transforms.ToTensor(),
+    transforms.Normalize(CIFAR_MEAN, CIFAR_STD),
+  ])
+  trainset = dataset(root=args.root, train=True, download=True, transform=transform_train)
+
+  print("loader, workers, samples/s, speedup")
+  base = None
+  for workers in args.workers:
+    loader = data.DataLoader(trainset, batch_size=args.train_batch, shuffle=True, num_workers=workers,
+                             persistent_workers=workers > 0)
+    speed = measure(loader)
+    base = base or speed
+    print("torchvision, {}, {:.0f}, {:.2f}x".format(workers, speed, speed / base))
+    del loader
+
+  trainloader, _ = tensor_cifar_loaders(dataset, args.root, args.train_batch, args.train_batch, device=args.device)
+  speed = measure(trainloader)
+  print("tensor, 0, {:.0f}, {:.2f}x".format(speed, speed / base))
+
+if __name__ == '__main__':
+  main()
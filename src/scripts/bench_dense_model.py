@@ -0,0 +1,183 @@
+"""
+ Copyright 2019 Sangkug Lym
+ Copyright 2019 The University of Texas at Austin
+
+ Licensed under the Apache License, Version 2.0 (the "License");
+ you may not use this file except in compliance with the License.
+ You may obtain a copy of the License at
+
+     http://www.apache.org/licenses/LICENSE-2.0
+
+ Unless required by applicable law or agreed to in writing, software
+ distributed under the License is distributed on an "AS IS" BASIS,
+ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ See the License for the specific language governing permissions and
+ limitations under the License.
+"""
+
+import os, sys
+import io
+import copy
+import time
+import argparse
+import contextlib
+
+import torch
+import torch.optim as optim
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import models.cifar as models_cifar
+import models.imagenet as models_imagenet
+from custom.checkpoint_utils import _makeSparse, _genDenseModel
+
+parser = argparse.ArgumentParser(description='Dense model compaction benchmark')
+parser.add_argument('-a', '--archs', nargs='+', default=['resnet32_flat', 'resnet50_bt_flat', 'mobilenet_flat'],
+                    help='flattened models to benchmark (the per-slice copy of resnet50_flat takes minutes)')
+parser.add_argument('--sparsity', default=0.3, type=float,
+                    help='ratio of channels forced to zero before the measurement')
+parser.add_argument('--threshold', default=0.0001, type=float,
+                    help='threshold to force weight to zero')
+parser.add_argument('--cuda', default=False, action='store_true', help='run on GPU')
+args = parser.parse_args()
+
+
+""" Per-slice tensor compaction (Reference)
+# This is the tensor compaction used by _genDenseModel before the index gather
+# Dead layer removal is not part of the measurement
+"""
+def genDenseTensorsLoop(model, dense_chs, optimizer, arch):
+  for name, param in model.named_parameters():
+    mom_param = optimizer.state[param]['momentum_buffer']
+    if (('conv' in name) or ('fc' in name)) and ('weight' in name):
+      if 'conv' in name:
+        conv_dw = int(name.split('.')[1].split('conv')[1]) %2 == 0
+      else:
+        conv_dw = False
+      dims = list(param.shape)
+      if 'mobilenet' in arch and conv_dw:
+        dense_in_ch_idxs = [0]
+      else:
+        dense_in_ch_idxs = dense_chs[name]['in_chs']
+      dense_out_ch_idxs = dense_chs[name]['out_chs']
+      num_in_ch, num_out_ch = len(dense_in_ch_idxs), len(dense_out_ch_idxs)
+      if num_in_ch == 0 or num_out_ch == 0:
+        continue
+
+      if len(dims) == 4:
+        new_param = param.new_empty(num_out_ch, num_in_ch, dims[2], dims[3])
+        new_mom_param = param.new_empty(num_out_ch, num_in_ch, dims[2], dims[3])
+        for in_idx, in_ch in enumerate(sorted(dense_in_ch_idxs)):
+          for out_idx, out_ch in enumerate(sorted(dense_out_ch_idxs)):
+            with torch.no_grad():
+              new_param[out_idx,in_idx,:,:] = param[out_ch,in_ch,:,:]
+              new_mom_param[out_idx,in_idx,:,:] = mom_param[out_ch,in_ch,:,:]
+      else:
+        new_param = param.new_empty(num_out_ch, num_in_ch)
+        new_mom_param = param.new_empty(num_out_ch, num_in_ch)
+        if ('fc1' in name) or ('fc2' in name):
+          for in_idx, in_ch in enumerate(sorted(dense_in_ch_idxs)):
+            for out_idx, out_ch in enumerate(sorted(dense_out_ch_idxs)):
+              with torch.no_grad():
+                new_param[out_idx,in_idx] = param[out_ch,in_ch]
+                new_mom_param[out_idx,in_idx] = mom_param[out_ch,in_ch]
+        else:
+          for in_idx, in_ch in enumerate(sorted(dense_in_ch_idxs)):
+            with torch.no_grad():
+              new_param[:,in_idx] = param[:,in_ch]
+              new_mom_param[:,in_idx] = mom_param[:,in_ch]
+      param.data = new_param
+      optimizer.state[param]['momentum_buffer'].data = new_mom_param
+
+    else:
+      w_name = name.replace('bias', 'weight').replace('bn', 'conv')
+      dense_out_ch_idxs = dense_chs[w_name]['out_chs']
+      new_param = param.new_empty(len(dense_out_ch_idxs))
+      new_mom_param = param.new_empty(len(dense_out_ch_idxs))
+      for out_idx, out_ch in enumerate(sorted(dense_out_ch_idxs)):
+        with torch.no_grad():
+          new_param[out_idx] = param[out_ch]
+          new_mom_param[out_idx] = mom_param[out_ch]
+      param.data = new_param
+      optimizer.state[param]['momentum_buffer'].data = new_mom_param
+
+  for name, buf in model.named_buffers():
+    if 'running_mean' in name or 'running_var' in name:
+      w_name = name.replace('bn', 'conv').split('running')[0]+'weight'
+      dense_out_ch_idxs = dense_chs[w_name]['out_chs']
+      new_buf = buf.new_empty(len(dense_out_ch_idxs))
+      for out_idx, out_ch in enumerate(sorted(dense_out_ch_idxs)):
+        with torch.no_grad():
+          new_buf[out_idx] = buf[out_ch]
+      buf.data = new_buf
+
+
+""" Emulate the group-lasso sparsified channels
+"""
+def sparsify(model, ratio):
+  with torch.no_grad():
+    for name, param in model.named_parameters():
+      if ('conv' in name or 'fc' in name) and 'weight' in name:
+        dead_out = torch.rand(param.shape[0]) < ratio
+        param[dead_out.to(param.device)] = 0.
+        if param.shape[1] > 1:
+          dead_in = torch.rand(param.shape[1]) < ratio
+          param[:, dead_in.to(param.device)] = 0.
+
+
+""" Build a model with populated momentum buffers and BN statistics
+"""
+def buildModel(arch):
+  if arch in models_imagenet.__dict__:
+    model, in_size = models_imagenet.__dict__[arch](), 224
+  else:
+    model, in_size = models_cifar.__dict__[arch](), 32
+  model = torch.nn.DataParallel(model)
+  if args.cuda:
+    model = model.cuda()
+  optimizer = optim.SGD(model.parameters(), lr=0.1, momentum=0.9, weight_decay=1e-4)
+
+  inputs = torch.randn(2, 3, in_size, in_size)
+  if args.cuda:
+    inputs = inputs.cuda()
+  model(inputs).sum().backward()
+  optimizer.step()
+  sparsify(model, args.sparsity)
+  return model, optimizer
+
+
+def measure(func, *func_args):
+  if args.cuda:
+    torch.cuda.synchronize()
+  start = time.time()
+  with contextlib.redirect_stdout(io.StringIO()):
+    func(*func_args)
+  if args.cuda:
+    torch.cuda.synchronize()
+  return time.time() - start
+
+
+def main():
+  print("arch, loop(s), gather(s), speedup")
+  for arch in args.archs:
+    model, optimizer = buildModel(arch)
+    dataset = 'imagenet' if arch in models_imagenet.__dict__ else 'cifar'
+    with contextlib.redirect_stdout(io.StringIO()):
+      dense_chs, _ = _makeSparse(model, args.threshold, arch, 'max', dataset)
+
+    # Identical copies of the model and its optimizer states
+    ref_model, ref_optimizer = copy.deepcopy((model, optimizer))
+
+    t_loop = measure(genDenseTensorsLoop, ref_model, dense_chs, ref_optimizer, arch)
+    t_gather = measure(_genDenseModel, model, dense_chs, optimizer, arch, dataset)
+
+    # Bit-identical parameters, momentum buffers and BN statistics
+    ref_state, state = ref_model.state_dict(), model.state_dict()
+    for name in state:
+      assert torch.equal(ref_state[name], state[name]), "Mismatch at [{}]".format(name)
+    for ref_param, param in zip(ref_model.parameters(), model.parameters()):
+      assert torch.equal(ref_optimizer.state[ref_param]['momentum_buffer'],
+                         optimizer.state[param]['momentum_buffer'])
+    print("{}, {:.4f}, {:.4f}, {:.1f}x".format(arch, t_loop, t_gather, t_loop / t_gather))
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,74 @@
+"""
+ Copyright 2019 Sangkug Lym
+ Copyright 2019 The University of Texas at Austin
+
+ Licensed under the Apache License, Version 2.0 (the "License");
+ you may not use this file except in compliance with the License.
+ You may obtain a copy of the License at
+
+     http://www.apache.org/licenses/LICENSE-2.0
+
+ Unless required by applicable law or agreed to in writing, software
+ distributed under the License is distributed on an "AS IS" BASIS,
+ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ See the License for the specific language governing permissions and
+ limitations under the License.
+"""
+
+import os, sys
+import time
+import argparse
+
+import torch
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import models.cifar as models_cifar
+import models.imagenet as models_imagenet
+from custom import get_group_lasso_global, get_group_lasso_group, GroupLassoRegularizer
+
+parser = argparse.ArgumentParser(description='Group lasso penalty benchmark')
+parser.add_argument('-a', '--archs', nargs='+', default=['resnet32_flat', 'resnet50_flat', 'mobilenet_flat'],
+                    help='flattened models to benchmark')
+parser.add_argument('--iters', default=20, type=int, help='number of measured iterations')
+parser.add_argument('--cuda', default=False, action='store_true', help='run on GPU')
+args = parser.parse_args()
+
+
+""" Per-step penalty time (Forward and backward)
+"""
+def measure(func, model, *func_args):
+  for _ in range(2):
+    func(*func_args).backward()
+  if args.cuda:
+    torch.cuda.synchronize()
+  start = time.time()
+  for _ in range(args.iters):
+    penalty = func(*func_args)
+    penalty.backward()
+  if args.cuda:
+    torch.cuda.synchronize()
+  model.zero_grad()
+  return (time.time() - start) / args.iters, penalty.item()
+
+
+def main():
+  print("arch, coeff, legacy(ms), regularizer(ms), speedup")
+  for arch in args.archs:
+    if arch in models_imagenet.__dict__:
+      model = models_imagenet.__dict__[arch]()
+    else:
+      model = models_cifar.__dict__[arch]()
+    model = torch.nn.DataParallel(model)
+    if args.cuda:
+      model = model.cuda()
+
+    for global_coeff, get_group_lasso in [(True, get_group_lasso_global), (False, get_group_lasso_group)]:
+      regularizer = GroupLassoRegularizer(model, arch, global_coeff)
+      t_legacy, ref = measure(get_group_lasso, model, model, arch)
+      t_reg, out = measure(regularizer, model)
+      assert abs(ref - out) <= 1e-5 * abs(ref), "Penalty mismatch at [{}]: {} vs {}".format(arch, ref, out)
+      print("{}, {}, {:.3f}, {:.3f}, {:.1f}x".format(arch, 'global' if global_coeff else 'group',
+                                                    t_legacy * 1000, t_reg * 1000, t_legacy / t_reg))
+
+if __name__ == '__main__':
+  main()
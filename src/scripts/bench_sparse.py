@@ -0,0 +1,133 @@
+"""
+ Copyright 2019 Sangkug Lym
+ Copyright 2019 The University of Texas at Austin
+
+ Licensed under the Apache License, Version 2.0 (the "License");
+ you may not use this file except in compliance with the License.
+ You may obtain a copy of the License at
+
+     http://www.apache.org/licenses/LICENSE-2.0
+
+ Unless required by applicable law or agreed to in writing, software
+ distributed under the License is distributed on an "AS IS" BASIS,
+ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ See the License for the specific language governing permissions and
+ limitations under the License.
+"""
+
+import os, sys
+import time
+import argparse
+
+import torch
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import models.cifar as models_cifar
+import models.imagenet as models_imagenet
+from custom.checkpoint_utils import _getDenseChMasks
+
+parser = argparse.ArgumentParser(description='Dense channel detection benchmark')
+parser.add_argument('-a', '--archs', nargs='+', default=['resnet50_flat', 'mobilenet_flat'],
+                    help='flattened models to benchmark')
+parser.add_argument('--sparsity', default=0.3, type=float,
+                    help='ratio of channels forced to zero before the measurement')
+parser.add_argument('--threshold', default=0.0001, type=float,
+                    help='threshold to force weight to zero')
+parser.add_argument('--iters', default=3, type=int, help='number of measured iterations')
+parser.add_argument('--cuda', default=False, action='store_true', help='run on GPU')
+args = parser.parse_args()
+
+
+""" Per-channel dense channel search (Reference)
+# This is the channel search used by _makeSparse before vectorization
+"""
+def getDenseChsLoop(model, threshold, arch):
+  dense_chs = {}
+  for name, param in model.named_parameters():
+    dims = list(param.shape)
+    if (('conv' in name) or ('fc' in name)) and ('weight' in name):
+      with torch.no_grad():
+        param = torch.where(param < threshold, torch.tensor(0.).to(param.device), param)
+
+      dense_in_chs, dense_out_chs = [], []
+      if param.dim() == 4:
+        if 'conv' in name:
+          conv_dw = int(name.split('.')[1].split('conv')[1]) %2 == 0
+        else:
+          conv_dw = False
+        if ('mobilenet' not in arch) or ('mobilenet' in arch and not conv_dw):
+          for c in range(dims[1]):
+            if param[:,c,:,:].abs().max() > 0:
+              dense_in_chs.append(c)
+        for c in range(dims[0]):
+          if param[c,:,:,:].abs().max() > 0:
+            dense_out_chs.append(c)
+
+      elif param.dim() == 2:
+        for c in range(dims[1]):
+          if param[:,c].abs().max() > 0:
+            dense_in_chs.append(c)
+        if any(i for i in ['fc1', 'fc2'] if i in name):
+          for c in range(dims[0]):
+            if param[c,:].abs().max() > 0:
+              dense_out_chs.append(c)
+        else:
+          dense_out_chs = [c for c in range(dims[0])]
+      dense_chs[name] = {'in_chs':dense_in_chs, 'out_chs':dense_out_chs}
+  return dense_chs
+
+
+""" Vectorized dense channel search
+"""
+def getDenseChsVec(model, threshold, arch):
+  dense_chs = {}
+  for name, ch_mask in _getDenseChMasks(model, threshold, arch).items():
+    in_idx, out_idx = ch_mask['in_idx'], ch_mask['out_idx']
+    dense_chs[name] = {'in_chs':[] if in_idx is None else in_idx.tolist(),
+                       'out_chs':out_idx.tolist()}
+  return dense_chs
+
+
+""" Emulate the group-lasso sparsified channels
+"""
+def sparsify(model, ratio):
+  with torch.no_grad():
+    for name, param in model.named_parameters():
+      if ('conv' in name or 'fc' in name) and 'weight' in name:
+        dead_out = torch.rand(param.shape[0]) < ratio
+        param[dead_out.to(param.device)] = 0.
+        if param.shape[1] > 1:
+          dead_in = torch.rand(param.shape[1]) < ratio
+          param[:, dead_in.to(param.device)] = 0.
+
+
+def measure(func, model, arch):
+  if args.cuda:
+    torch.cuda.synchronize()
+  start = time.time()
+  for _ in range(args.iters):
+    out = func(model, args.threshold, arch)
+  if args.cuda:
+    torch.cuda.synchronize()
+  return (time.time() - start) / args.iters, out
+
+
+def main():
+  print("arch, loop(s), vectorized(s), speedup")
+  for arch in args.archs:
+    if arch in models_imagenet.__dict__:
+      model = models_imagenet.__dict__[arch]()
+    else:
+      model = models_cifar.__dict__[arch]()
+    model = torch.nn.DataParallel(model)
+    if args.cuda:
+      model = model.cuda()
+    sparsify(model, args.sparsity)
+
+    t_loop, ref = measure(getDenseChsLoop, model, arch)
+    t_vec, out = measure(getDenseChsVec, model, arch)
+    assert ref == out, "Dense channel mismatch at [{}]".format(arch)
+    print("{}, {:.4f}, {:.4f}, {:.1f}x".format(arch, t_loop, t_vec, t_loop / t_vec))
+
+if __name__ == '__main__':
+  main()
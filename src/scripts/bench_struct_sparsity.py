@@ -0,0 +1,165 @@
+"""
+ Copyright 2019 Sangkug Lym
+ Copyright 2019 The University of Texas at Austin
+
+ Licensed under the Apache License, Version 2.0 (the "License");
+ you may not use this file except in compliance with the License.
+ You may obtain a copy of the License at
+
+     http://www.apache.org/licenses/LICENSE-2.0
+
+ Unless required by applicable law or agreed to in writing, software
+ distributed under the License is distributed on an "AS IS" BASIS,
+ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ See the License for the specific language governing permissions and
+ limitations under the License.
+"""
+
+import os, sys
+import io
+import time
+import argparse
+import contextlib
+
+import numpy as np
+import torch
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import models.cifar as models_cifar
+import models.imagenet as models_imagenet
+from custom.checkpoint_utils import _getConvStructSparsity
+from custom.cost_model import getLayerShapes
+
+parser = argparse.ArgumentParser(description='Structural sparsity analysis benchmark')
+parser.add_argument('-a', '--archs', nargs='+', default=['resnet32_flat', 'resnet50_bt_flat'],
+                    help='flattened models to benchmark (the per-filter loop takes minutes on resnet50_flat)')
+parser.add_argument('--sparsity', default=0.3, type=float,
+                    help='ratio of channels forced to zero before the measurement')
+parser.add_argument('--threshold', default=0.0001, type=float,
+                    help='threshold to force weight to zero')
+args = parser.parse_args()
+
+WORD_SIZE = 4
+MFLOPS = 1000000/2
+
+
+""" Per-filter structural sparsity analysis (Reference)
+# This is the analysis used by _getConvStructSparsity before vectorization
+"""
+def getConvStructSparsityLoop(model, threshold, arch, dataset):
+  conv_struct_density = {}
+  conv_rand_density = {}
+  sparse_bi_map = {}
+  sparse_val_map = {}
+  conv_id = 0
+  model_size = 0
+  acc_inf_cost = 0
+
+  fmap = getLayerShapes(model, dataset)
+
+  for name, param in model.named_parameters():
+    if ('weight' in name) and ('conv' in name or 'fc' in name):
+      layer = []
+      dims = list(param.shape)
+
+      if len(dims) == 4:
+        channel_map = np.zeros([dims[1], dims[0]])
+        filter_size = dims[2] * dims[3]
+        for in_ch in range(dims[1]):
+          fil_row = []
+          for out_ch in range(dims[0]):
+            fil = param.data.numpy()[out_ch,in_ch,:,:]
+            fil_max = np.absolute(fil).max()
+            fil_row.append(fil_max)
+            if fil_max > 0.:
+              channel_map[in_ch, out_ch] = 1
+          layer.append(fil_row)
+
+      elif len(dims) == 2:
+        channel_map = np.zeros([dims[1], dims[0]])
+        filter_size = 1
+        for in_ch in range(dims[1]):
+          fil_row = []
+          for out_ch in range(dims[0]):
+            fil = param.data.numpy()[out_ch,in_ch]
+            fil_max = np.absolute(fil)
+            fil_row.append(fil_max)
+            if fil_max > 0.:
+              channel_map[in_ch, out_ch] = 1
+          layer.append(fil_row)
+
+      weights = param.data.numpy()
+      weight_density = float(weights[weights >= threshold].size) / weights.size
+
+      sparse_val_map[conv_id] = np.array(layer)
+      sparse_bi_map[conv_id] = channel_map
+
+      rows = channel_map.max(axis=1) # in_channels
+      cols = channel_map.max(axis=0) # out_channels
+
+      num_dense_out_ch = float(np.count_nonzero(cols))
+      num_dense_in_ch = float(np.count_nonzero(rows))
+
+      conv_struct_density[conv_id] = {'in_ch':num_dense_in_ch / len(rows), 'out_ch':num_dense_out_ch / len(cols)}
+      conv_rand_density[conv_id] = weight_density
+
+      model_size += num_dense_out_ch * num_dense_in_ch * filter_size # Add filters
+      model_size += num_dense_out_ch  # Add bias
+
+      fmap_name = name.split('module.')[1].split('.weight')[0]
+      if len(dims) == 4:
+        out_shape = fmap[fmap_name]['out_shape']
+        inf_cost = (num_dense_in_ch * dims[2] * dims[3]) * (num_dense_out_ch) * (out_shape[1] * out_shape[2])
+      elif len(dims) == 2:
+        inf_cost = (num_dense_in_ch * num_dense_out_ch)
+
+      conv_id += 1
+      acc_inf_cost += inf_cost
+
+  return sparse_bi_map, \
+         sparse_val_map, \
+         conv_id, \
+         conv_struct_density, \
+         conv_rand_density, \
+         (model_size * WORD_SIZE), \
+         acc_inf_cost/MFLOPS
+
+
+""" Emulate the group-lasso sparsified channels
+"""
+def sparsify(model, ratio):
+  with torch.no_grad():
+    for name, param in model.named_parameters():
+      if ('conv' in name or 'fc' in name) and 'weight' in name:
+        param[torch.rand(param.shape[0]) < ratio] = 0.
+        if param.shape[1] > 1:
+          param[:, torch.rand(param.shape[1]) < ratio] = 0.
+
+
+def main():
+  print("arch, loop(s), vectorized(s), speedup")
+  for arch in args.archs:
+    if arch in models_imagenet.__dict__:
+      model, dataset = models_imagenet.__dict__[arch](), 'imagenet'
+    else:
+      model, dataset = models_cifar.__dict__[arch](), 'cifar'
+    model = torch.nn.DataParallel(model)
+    sparsify(model, args.sparsity)
+
+    start = time.time()
+    ref = getConvStructSparsityLoop(model, args.threshold, arch, dataset)
+    t_loop = time.time() - start
+    start = time.time()
+    with contextlib.redirect_stdout(io.StringIO()):
+      out = _getConvStructSparsity(model, args.threshold, None, arch, dataset)
+    t_vec = time.time() - start
+
+    # Identical maps, densities, model size and inference cost
+    for ref_map, out_map in zip(ref[:2], out[:2]):
+      for conv_id in ref_map:
+        assert np.array_equal(ref_map[conv_id], out_map[conv_id]), "Map mismatch at [{}] layer {}".format(arch, conv_id)
+    assert ref[2:] == out[2:], "Density/cost mismatch at [{}]".format(arch)
+    print("{}, {:.4f}, {:.4f}, {:.1f}x".format(arch, t_loop, t_vec, t_loop / t_vec))
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,209 @@
+"""
+ Copyright 2019 Sangkug Lym
+ Copyright 2019 The University of Texas at Austin
+
+ Licensed under the Apache License, Version 2.0 (the "License");
+ you may not use this file except in compliance with the License.
+ You may obtain a copy of the License at
+
+     http://www.apache.org/licenses/LICENSE-2.0
+
+ Unless required by applicable law or agreed to in writing, software
+ distributed under the License is distributed on an "AS IS" BASIS,
+ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ See the License for the specific language governing permissions and
+ limitations under the License.
+"""
+
+import os, sys
+import glob
+import json
+import time
+import argparse
+import resource
+import subprocess
+import importlib.util
+
+import torch
+import torch.nn as nn
+import torch.optim as optim
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(SRC_DIR)
+
+parser = argparse.ArgumentParser(description='Training throughput benchmark of the flattened models')
+parser.add_argument('-a', '--archs', nargs='+', default=None,
+                    help='models under src/models to benchmark (default: all)')
+parser.add_argument('--arch_files', nargs='+', default=[],
+                    help='generated (pruned) network files to benchmark against their _ori baseline')
+parser.add_argument('--cifar_batch', default=64, type=int, help='mini-batch size of the CIFAR models')
+parser.add_argument('--imagenet_batch', default=8, type=int, help='mini-batch size of the ImageNet models')
+parser.add_argument('--warmup', default=2, type=int, help='number of warm-up iterations')
+parser.add_argument('--iters', default=5, type=int, help='number of measured iterations')
+parser.add_argument('--threads', default=None, type=int, help='number of intra-op CPU threads')
+parser.add_argument('--cuda', default=False, action='store_true', help='run on GPU')
+parser.add_argument('-o', '--out', default='bench_throughput.json', type=str,
+                    help='path of the JSON report')
+# Internal: measure a single network file in this process
+parser.add_argument('--worker', default=None, type=str, help=argparse.SUPPRESS)
+parser.add_argument('--dataset', default='cifar', type=str, help=argparse.SUPPRESS)
+args = parser.parse_args()
+
+MODEL_DIRS = {'cifar':os.path.join(SRC_DIR, 'models', 'cifar'),
+              'imagenet':os.path.join(SRC_DIR, 'models', 'imagenet')}
+
+
+""" Load the model constructor defined in a network file
+"""
+def loadModelFn(path):
+  name = os.path.splitext(os.path.basename(path))[0]
+  spec = importlib.util.spec_from_file_location('bench_'+name, path)
+  module = importlib.util.module_from_spec(spec)
+  spec.loader.exec_module(module)
+  fns = [v for k, v in vars(module).items()
+         if callable(v) and not isinstance(v, type) and not k.startswith('_')
+         and getattr(v, '__module__', None) == module.__name__]
+  assert len(fns) == 1, "Expected one model constructor in [{}]".format(path)
+  return fns[0]
+
+
+def sync():
+  if args.cuda:
+    torch.cuda.synchronize()
+
+
+""" Measure forward, backward and optimizer step time of a network file
+# Runs in its own process so that the peak memory belongs to this model only
+"""
+def worker(path, dataset):
+  if args.threads != None:
+    torch.set_num_threads(args.threads)
+  model_fn = loadModelFn(path)
+  model = model_fn()
+  in_size = 224 if dataset == 'imagenet' else 32
+  batch = args.imagenet_batch if dataset == 'imagenet' else args.cifar_batch
+  num_classes = model.fc.out_features
+
+  criterion = nn.CrossEntropyLoss()
+  optimizer = optim.SGD(model.parameters(), lr=0.1, momentum=0.9, weight_decay=1e-4)
+  inputs = torch.randn(batch, 3, in_size, in_size)
+  targets = torch.randint(num_classes, (batch,))
+  if args.cuda:
+    model, criterion = model.cuda(), criterion.cuda()
+    inputs, targets = inputs.cuda(), targets.cuda()
+  model.train()
+
+  t_fwd, t_bwd, t_step = 0., 0., 0.
+  for i in range(args.warmup + args.iters):
+    sync()
+    start = time.perf_counter()
+    loss = criterion(model(inputs), targets)
+    sync()
+    fwd_end = time.perf_counter()
+    optimizer.zero_grad()
+    loss.backward()
+    sync()
+    bwd_end = time.perf_counter()
+    optimizer.step()
+    sync()
+    step_end = time.perf_counter()
+    if i >= args.warmup:
+      t_fwd += fwd_end - start
+      t_bwd += bwd_end - fwd_end
+      t_step += step_end - bwd_end
+
+  t_fwd, t_bwd, t_step = [t / args.iters for t in [t_fwd, t_bwd, t_step]]
+  if args.cuda:
+    peak_mem = torch.cuda.max_memory_allocated() / (1024. *1024.)
+  else:
+    # ru_maxrss is in KB on Linux
+    peak_mem = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.
+  return {'dataset':dataset, 'batch':batch,
+          'params':sum(p.numel() for p in model.parameters()),
+          'fwd_ms':t_fwd *1000., 'bwd_ms':t_bwd *1000., 'step_ms':t_step *1000.,
+          'samples_per_s':batch / (t_fwd + t_bwd + t_step),
+          'peak_mem_mb':peak_mem}
+
+
+""" Launch a worker process per network file
+"""
+def run(path, dataset):
+  cmd = [sys.executable, os.path.abspath(__file__), '--worker', path, '--dataset', dataset,
+         '--cifar_batch', str(args.cifar_batch), '--imagenet_batch', str(args.imagenet_batch),
+         '--warmup', str(args.warmup), '--iters', str(args.iters)]
+  if args.threads != None:
+    cmd += ['--threads', str(args.threads)]
+  if args.cuda:
+    cmd += ['--cuda']
+  proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+  if proc.returncode != 0:
+    err = proc.stderr.strip().split('\n')
+    return {'dataset':dataset, 'error':err[-1] if err else 'exit code {}'.format(proc.returncode)}
+  return json.loads(proc.stdout.strip().split('\n')[-1])
+
+
+""" Benchmark jobs: [label, network file, dataset, _ori baseline file]
+"""
+def getJobs():
+  jobs = []
+  for dataset, model_dir in MODEL_DIRS.items():
+    for path in sorted(glob.glob(os.path.join(model_dir, '*_flat.py'))):
+      name = os.path.splitext(os.path.basename(path))[0]
+      if args.archs != None and name not in args.archs:
+        continue
+      base = os.path.join(model_dir, name+'_ori.py')
+      jobs.append([name, path, dataset, base if os.path.exists(base) else None])
+
+  # Generated files are compared against the _ori file of their model constructor
+  for path in args.arch_files:
+    path = os.path.abspath(path)
+    name = loadModelFn(path).__name__
+    job = [os.path.basename(path), path, 'cifar', None]
+    for dataset, model_dir in MODEL_DIRS.items():
+      base = os.path.join(model_dir, name+'_ori.py')
+      if os.path.exists(base):
+        job[2:] = [dataset, base]
+    jobs.append(job)
+  return jobs
+
+
+def main():
+  if args.worker != None:
+    print(json.dumps(worker(args.worker, args.dataset)))
+    return
+
+  jobs, results = getJobs(), {}
+  for label, path, dataset, base in jobs:
+    for p in [base, path]:
+      if p != None and p not in results:
+        results[p] = run(p, dataset)
+        results[p]['file'] = os.path.relpath(p, SRC_DIR)
+
+  report = []
+  print("{:<28} {:>6} {:>9} {:>9} {:>9} {:>10} {:>9} {:>8}".format(
+      'arch', 'batch', 'fwd(ms)', 'bwd(ms)', 'step(ms)', 'samples/s', 'peak(MB)', 'speedup'))
+  for label, path, dataset, base in jobs:
+    entry = {'arch':label, 'model':results[path],
+             'baseline':results[base] if base != None else None}
+    res = entry['model']
+    if 'error' in res:
+      print("{:<28} error: {}".format(label, res['error']))
+    else:
+      speedup = '-'
+      if base != None and 'error' in results[base]:
+        speedup = 'n/a'
+      elif base != None:
+        entry['speedup'] = res['samples_per_s'] / results[base]['samples_per_s']
+        speedup = '{:.2f}x'.format(entry['speedup'])
+      print("{:<28} {:>6} {:>9.1f} {:>9.1f} {:>9.1f} {:>10.1f} {:>9.0f} {:>8}".format(
+          label, res['batch'], res['fwd_ms'], res['bwd_ms'], res['step_ms'],
+          res['samples_per_s'], res['peak_mem_mb'], speedup))
+    report.append(entry)
+
+  with open(args.out, 'w') as f:
+    json.dump({'threads':args.threads, 'cuda':args.cuda, 'warmup':args.warmup,
+               'iters':args.iters, 'results':report}, f, indent=2)
+  print("Report written to {}".format(args.out))
+
+if __name__ == '__main__':
+  main()
@@ -15,17 +15,23 @@
  limitations under the License.
 """
 
-import os
+import os, sys
 import glob
+import json
 import argparse
 
-from feature_size_cifar import *
-from scripts_util import *
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from custom.cost_model import getArchLayerShapes, getLayerCost
+from custom.latency_table import LatencyTable
 
 parser = argparse.ArgumentParser()
-parser.add_argument('-i', '--in_dir', type=str)
-parser.add_argument('-a', '--arch', type=str)
+parser.add_argument('-i', '--in_dir', type=str,
+                    help='trainer logs (glob): events.jsonl event streams or stdout logs')
+parser.add_argument('-a', '--arch', type=str, help='flattened model (e.g. resnet50_flat)')
+parser.add_argument('-d', '--dataset', default='imagenet', choices=['cifar', 'imagenet'], type=str)
 parser.add_argument('-g', '--gating', default=False, action='store_true')
+parser.add_argument('--latency_table', default=None, type=str,
+                    help='CPU latency lookup table (profile_latency.py): predicted latency of each architecture')
 args = parser.parse_args()
 
 LARGE = 99999999999999
@@ -41,13 +47,31 @@ epochs = 90
 
 cifar = 50000. / mini_batch
 imgnet = 1281167. / mini_batch
-iters_per_epoch = imgnet
-bn = True
+iters_per_epoch = imgnet if args.dataset == 'imagenet' else cifar
 
 inf_list = glob.glob(args.in_dir)
-fmap = imagenet_feature_size[args.arch]
+# Layer shapes of the base model from shape propagation (Feature map sizes are kept after pruning)
+fmap = getArchLayerShapes(args.arch, args.dataset)
+base_arch = dict((lyr_name, lyr['weight_shape']) for lyr_name, lyr in fmap.items() if lyr['type'] != 'bn')
+latency_table = LatencyTable(args.latency_table) if args.latency_table else None
 log_tot = {'coeff':[], 'train_cost':[], 'bn_cost':[], 'best_acc':[], 'inf_cost':[]}
 
+""" Weight shape of a layer: [out_chs, in_chs(, fil_height, fil_width)] (None: removed layer)
+# Gating: the dense channels of the layer on a shared node
+"""
+def getLayerShape(lyr, base=False):
+    if base:
+        return list(lyr)
+    if lyr['cfg'] == None:
+        return None
+
+    shape = list(lyr['cfg'])
+    if args.gating:
+        shape[1] = shape[1] if (lyr['gt'][1] == None) else lyr['gt'][1]
+        shape[0] = shape[0] if (lyr['gt'][0] == None) else lyr['gt'][0]
+    return shape
+
+
 """ Calcuate below metrics from the network architecture
 # 1. training cost
 # 2. inference cost
@@ -62,63 +86,22 @@ def getTrainingCost(arch, base=False, verbose=True):
     out_act, out_chs_tot, model_size = 0, 0, 0
     
     for lyr_name, lyr in arch.items():
-        out_chs = 0
-
-        if base:
-            dims = len(lyr)
-            if dims == 4:
-                k, c, r, s  = lyr[0], lyr[1], lyr[2], lyr[3]
-                pad = 0 if (lyr[2] == 1) else 2
-                out_chs = k
-                if args.arch == 'resnet50' and lyr_name == 'conv1':
-                    pad = 3
-            else:
-                k, c  = lyr[0], lyr[1]
-            #print("base, {}, {}, {}, {}, {}, {}".format(lyr_name, c, k, r, s, pad))
-        else:
-            if lyr['cfg'] == None:
-                continue
-
-            dims = len(lyr['cfg'])
-            if args.gating:
-                c = lyr['cfg'][1] if (lyr['gt'][1] == None) else lyr['gt'][1]
-                k = lyr['cfg'][0] if (lyr['gt'][0] == None) else lyr['gt'][0]
-                out_chs = k
-            else:
-                c = lyr['cfg'][1]
-                k = lyr['cfg'][0]
-                out_chs = k
-
-            if dims == 4:
-                r, s = lyr['cfg'][2], lyr['cfg'][3]
-                pad = 0 if (r == 1) else 2
-                if args.arch == 'resnet50' and lyr_name == 'conv1':
-                    pad = 3
-
-        if dims == 4:
-            # Inference cost = (CRS)(K)(PQ)
-            inf_cost    = (c * r * s) * k * (fmap[lyr_name][1]**2)
-
-            # Train cost = Forward + WGRAD + DGRAD
-            # = (CRS)(K)(NPQ) + (CRS)(NPQ)(K) + (NHW)(KRS)(C)
-            # = (N x inference_cost x2) + (NHW)(KRS)(C)
-            train_cost  = mini_batch *(2*inf_cost + ((fmap[lyr_name][0]+pad)**2) * (k * r * s) * c)
-            #train_cost  = mini_batch *(2*inf_cost + fmap[lyr_name][0]**2 * (k * r * s) * c)
-            # BN cost = (3 x NKPQ) + (5 x NKPQ)
-            bn_cost = 8 * (mini_batch * k * (fmap[lyr_name][1]**2))
-            model_size += float(r*s*c*k*WORD)/MB
-            if bn:
-                model_size += float(k*WORD)/MB
-        else:
-            # Forward: NCK
-            inf_cost    = k * c
-            train_cost  = k * c * mini_batch * 3
-            bn_cost     = 0
-            model_size += float(c*k*WORD)/MB
-            model_size += float(k*WORD)/MB
+        shape = getLayerShape(lyr, base)
+        if shape == None:
+            continue
+        out_chs = shape[0]
+
+        # Inference cost = (CRS)(K)(PQ)
+        # Train cost = Forward + WGRAD + DGRAD = (CRS)(K)(NPQ) + (CRS)(NPQ)(K) + (NHW)(KRS)(C)
+        # BN cost = (3 x NKPQ) + (5 x NKPQ)
+        cost = getLayerCost(shape, fmap[lyr_name], word_size=WORD)
+        inf_cost    = cost['fwd']
+        train_cost  = mini_batch * (cost['fwd'] + cost['wgrad'] + cost['dgrad'])
+        bn_cost     = mini_batch * cost['bn']
+        model_size += float(cost['params'])/MB
 
         if 'fc' not in lyr_name:
-            out_act += out_chs * (fmap[lyr_name][1]**2)
+            out_act += cost['act']
             out_chs_tot += out_chs
 
         if verbose: 
@@ -131,8 +114,6 @@ def getTrainingCost(arch, base=False, verbose=True):
         train_cost_acc  += train_cost
         bn_cost_acc     += bn_cost
 
-        #print("{}, {}, {}, {}, {}, {}, {}".format(lyr_name, c, k, r, s, pad, inf_cost))
-
     train_cost_acc *= iters_per_epoch
     bn_cost_acc *= iters_per_epoch
 
@@ -141,8 +122,71 @@ def getTrainingCost(arch, base=False, verbose=True):
     return train_cost_acc, bn_cost_acc, inf_cost_acc, out_act, out_chs_tot, model_size
 
 
+""" Predicted forward+backward latency (ms per iteration) of the network architecture
+# Conv/FC layers and the BN layer of each conv from the latency lookup table
+# (The layers of geometries missing in the table are not counted)
+"""
+def getLatency(arch, base=False):
+    latency = 0.
+    for lyr_name, lyr in arch.items():
+        shape = getLayerShape(lyr, base)
+        if shape == None:
+            continue
+        lyrs = [(shape, fmap[lyr_name])]
+        if len(shape) == 4:
+            lyrs.append(([shape[0]], {'type':'bn', 'out_shape':fmap[lyr_name]['out_shape']}))
+        for weight_shape, lyr_shape in lyrs:
+            ms = latency_table.predict(weight_shape, lyr_shape)
+            latency += 0. if ms == None else ms
+    return latency
+
+
+""" Per-architecture costs from a trainer event stream (events.jsonl)
+# The stream is parsed record by record (No stdout scraping)
+# 1. epoch: trained epochs and test accuracy (A resumed run re-logs the resumed epochs)
+# 2. reconf: layer shapes after each reconfiguration (and the dense channels for gating)
+# The architecture of an epoch is the one of the last reconfiguration before it
+"""
+def readEventLog(f_name):
+    epochs, reconfs, best_acc, lasso_scale = set(), {}, 0., None
+    with open(f_name, 'r') as f:
+        for line in f:
+            record = json.loads(line)
+            if record['event'] == 'epoch':
+                epochs.add(record['epoch'])
+                best_acc = max(best_acc, record['test_acc'])
+            elif record['event'] == 'reconf':
+                reconfs[record['epoch']] = record
+            elif record['event'] == 'start':
+                lasso_scale = record.get('lasso_scale', lasso_scale)
+            elif record['event'] == 'end':
+                best_acc = max(best_acc, record['best_acc'])
+
+    log = {'epoch':[], 'num_epochs':[], 'train_cost':[], 'bn_cost':[], 'inf_cost':[], 'out_act':[], 'out_chs':[], 'model_size':[], 'latency_ms':[]}
+    bounds = [0] + sorted(reconfs) + [LARGE]
+    for idx in range(len(bounds) -1):
+        if idx == 0:
+            arch, base = base_arch, True
+        else:
+            record = reconfs[bounds[idx]]
+            arch, base = {}, False
+            for lyr_name, shape in record['layers'].items():
+                dense = record['dense'].get(lyr_name, [None, None])
+                arch[lyr_name] = {'cfg':shape, 'gt':[chs if chs else None for chs in dense]}
+        costs = getTrainingCost(arch, base=base, verbose=False)
+        if latency_table != None:
+            log['latency_ms'].append(getLatency(arch, base=base))
+
+        log['epoch'].append(bounds[idx] +1)
+        log['num_epochs'].append(len([e for e in epochs if bounds[idx] < e <= bounds[idx+1]]))
+        for key, cost in zip(['train_cost', 'bn_cost', 'inf_cost', 'out_act', 'out_chs', 'model_size'], costs):
+            log[key].append(cost)
+    log['lasso_scale'] = lasso_scale
+    return log, best_acc
+
+
 # Training iterations before compression
-train_cost_base, bn_cost_base, inf_cost_base, out_act_base, out_chs_base, model_size_base = getTrainingCost(base_archs[args.arch], base=True)
+train_cost_base, bn_cost_base, inf_cost_base, out_act_base, out_chs_base, model_size_base = getTrainingCost(base_arch, base=True)
 
 # Base architecture cost
 log_tot['coeff'].append(0.)
@@ -152,6 +196,36 @@ log_tot['best_acc'].append( 100 )
 log_tot['inf_cost'].append( inf_cost_base )
 
 for inf_name in sorted(inf_list):
+    if inf_name.endswith('.jsonl'):
+        log, best_acc = readEventLog(inf_name)
+        coeff = os.path.basename(os.path.dirname(os.path.abspath(inf_name)))
+        # Runs of the per-group lasso scales (global, params, flops) are told apart in the summary
+        if log['lasso_scale'] != None:
+            coeff = '{} ({})'.format(coeff, log['lasso_scale'])
+        log_tot['coeff'].append(coeff)
+        log_tot['train_cost'].append( sum(c * n for c, n in zip(log['train_cost'], log['num_epochs'])) )
+        log_tot['bn_cost'].append( sum(c * n for c, n in zip(log['bn_cost'], log['num_epochs'])) )
+        log_tot['best_acc'].append( best_acc )
+        log_tot['inf_cost'].append( min(log['inf_cost']) )
+
+        print("Total [{}] epochs processed...".format(sum(log['num_epochs'])))
+        print("======== {} =======".format(coeff))
+        print("{}, {}, {}, {}, {}, {}, {}, {}".format('epoch', 'num_epochs', 'train_cost', 'bn_cost', 'inf_cost', 'out_act', 'out_chs', 'model_size'))
+        for idx, e in enumerate(log['epoch']):
+            print('{}, {}, {}, {}, {}, {}, {}, {}'.format(e, log['num_epochs'][idx],
+                                                 log['train_cost'][idx],
+                                                 log['bn_cost'][idx],
+                                                 log['inf_cost'][idx],
+                                                 log['out_act'][idx],
+                                                 log['out_chs'][idx],
+                                                 log['model_size'][idx]))
+        if latency_table != None:
+            print("epoch, latency_ms, saved (batch {})".format(latency_table.batch))
+            for idx, e in enumerate(log['epoch']):
+                print('{}, {}, {}'.format(e, log['latency_ms'][idx], 1. - log['latency_ms'][idx] / log['latency_ms'][0]))
+        continue
+
+    # Legacy: scrape the trainer stdout
     inf = open(inf_name, 'r')
     log = {'epoch':[], 'train_cost':[], 'bn_cost':[], 'inf_cost':[], 'out_act':[], 'out_chs':[], 'model_size':[]}
 
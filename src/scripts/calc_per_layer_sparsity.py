@@ -4,7 +4,8 @@ from os.path import isfile, join
 from statistics import mean
 from collections import OrderedDict
 
-from custom.checkpoint_utils_fp32 import Checkpoint
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from custom.checkpoint_utils import Checkpoint
 
 MB = 1024*1024
 
@@ -71,7 +72,7 @@ def main():
         if idx == 0 : model.printParams()
 
         # Generate conv layer sparsity
-        sparse_bi_map, sparse_val_map, num_lyrs, conv_density, model_size, inf_cost =\
+        sparse_bi_map, sparse_val_map, num_lyrs, conv_density, rand_density, model_size, inf_cost =\
                 model.getConvStructSparsity(threshold, out_dir+"/out_txt")
 
         sparse_val_maps[idx] = sparse_val_map
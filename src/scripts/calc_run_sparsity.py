@@ -0,0 +1,152 @@
+"""
+ Copyright 2019 Sangkug Lym
+ Copyright 2019 The University of Texas at Austin
+
+ Licensed under the Apache License, Version 2.0 (the "License");
+ you may not use this file except in compliance with the License.
+ You may obtain a copy of the License at
+
+     http://www.apache.org/licenses/LICENSE-2.0
+
+ Unless required by applicable law or agreed to in writing, software
+ distributed under the License is distributed on an "AS IS" BASIS,
+ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ See the License for the specific language governing permissions and
+ limitations under the License.
+"""
+
+import os, sys
+import re
+import csv
+import time
+import argparse
+import multiprocessing as mp
+
+import torch
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from custom.checkpoint_utils import _getLayerStructSparsity, WORD_SIZE, MFLOPS
+from custom.compact_checkpoint import CompactCheckpoint, isCompactCheckpoint
+from custom.delta_checkpoint import loadCheckpoint
+from custom.cost_model import getArchLayerShapes
+
+parser = argparse.ArgumentParser(description='Per-epoch, per-layer sparsity of every checkpoint of a run')
+parser.add_argument('run_dir', type=str, help='checkpoint directory of a training run')
+parser.add_argument('-a', '--arch', required=True, type=str, help='flattened model (e.g. resnet50_flat)')
+parser.add_argument('-d', '--dataset', default='cifar', choices=['cifar', 'imagenet'], type=str)
+parser.add_argument('--threshold', default=0.0001, type=float, help='threshold of a dense weight')
+parser.add_argument('-j', '--workers', default=os.cpu_count(), type=int, help='number of worker processes')
+parser.add_argument('--mem_budget', default=0., type=float,
+                    help='memory budget of the workers in GB (0: no limit)')
+parser.add_argument('-o', '--out', default='sparsity.csv', type=str,
+                    help='output table (.csv, or .parquet with pandas installed)')
+args = parser.parse_args()
+
+MB = 1024*1024
+GB = 1024*MB
+
+# Interval checkpoints: checkpoint<epoch>.tar (torch.save, delta) or checkpoint<epoch>.ptc (compact)
+CKPT_NAME = re.compile(r'^checkpoint(\d+)\.(tar|ptc)$')
+
+# Estimated worker memory: interpreter and torch + a few copies of the checkpoint
+WORKER_BASE_MEM = 400*MB
+WORKER_CKPT_COPIES = 3
+
+COLUMNS = ['epoch', 'layer', 'in_chs', 'out_chs', 'dense_in_chs', 'dense_out_chs',
+           'in_density', 'out_density', 'weight_density', 'model_size_mb', 'inf_mflops']
+
+
+""" Checkpoint of each epoch (Compact checkpoints are preferred: no unpickling)
+"""
+def findCheckpoints(run_dir):
+  ckpts = {}
+  for f in sorted(os.listdir(run_dir)):
+    match = CKPT_NAME.match(f)
+    if match:
+      epoch = int(match.group(1))
+      if epoch not in ckpts or f.endswith('.ptc'):
+        ckpts[epoch] = os.path.join(run_dir, f)
+  return sorted(ckpts.items())
+
+
+""" Weights of a checkpoint without building the model and optimizer
+"""
+def getWeights(path):
+  if isCompactCheckpoint(path):
+    return CompactCheckpoint(path).named_parameters()
+  return loadCheckpoint(path, map_location='cpu')['state_dict'].items()
+
+
+def initWorker():
+  # One process per core: No intra-op threads
+  torch.set_num_threads(1)
+
+
+""" Rows of one checkpoint: one per (conv, FC) layer and a total
+"""
+def analyze(job):
+  epoch, path, arch, dataset, threshold = job
+  fmap = getArchLayerShapes(arch, dataset)
+  rows = []
+  tot = dict((key, 0.) for key in ['in_chs', 'out_chs', 'dense_in_chs', 'dense_out_chs',
+                                   'model_size', 'inf_cost'])
+  for name, param in getWeights(path):
+    if ('weight' in name) and ('conv' in name or 'fc' in name):
+      lyr = _getLayerStructSparsity(name, param, threshold, fmap)
+      rows.append([epoch, name.split('module.')[-1].split('.weight')[0],
+                   lyr['in_chs'], lyr['out_chs'], int(lyr['dense_in_chs']), int(lyr['dense_out_chs']),
+                   lyr['in_density'], lyr['out_density'], lyr['weight_density'],
+                   lyr['model_size'] * WORD_SIZE / MB, lyr['inf_cost'] / MFLOPS])
+      for key in tot:
+        tot[key] += lyr[key]
+
+  rows.append([epoch, 'total', int(tot['in_chs']), int(tot['out_chs']),
+               int(tot['dense_in_chs']), int(tot['dense_out_chs']),
+               tot['dense_in_chs'] / max(tot['in_chs'], 1), tot['dense_out_chs'] / max(tot['out_chs'], 1), '',
+               tot['model_size'] * WORD_SIZE / MB, tot['inf_cost'] / MFLOPS])
+  return rows
+
+
+""" Number of workers fitting in the memory budget
+"""
+def getNumWorkers(ckpts):
+  num_workers = max(1, min(args.workers, len(ckpts)))
+  if args.mem_budget > 0 and len(ckpts) > 0:
+    ckpt_size = max(os.path.getsize(path) for _, path in ckpts)
+    worker_mem = WORKER_BASE_MEM + WORKER_CKPT_COPIES * ckpt_size
+    num_workers = max(1, min(num_workers, int(args.mem_budget * GB / worker_mem)))
+  return num_workers
+
+
+def writeTable(rows, out):
+  if out.endswith('.parquet'):
+    import pandas as pd
+    pd.DataFrame(rows, columns=COLUMNS).to_parquet(out)
+  else:
+    with open(out, 'w', newline='') as f:
+      writer = csv.writer(f)
+      writer.writerow(COLUMNS)
+      writer.writerows(rows)
+
+
+def main():
+  ckpts = findCheckpoints(args.run_dir)
+  assert len(ckpts) > 0, "No checkpoint<epoch>.tar/.ptc in [{}]".format(args.run_dir)
+  num_workers = getNumWorkers(ckpts)
+  print("[INFO] {} checkpoints, {} workers".format(len(ckpts), num_workers))
+
+  start = time.time()
+  jobs = [(epoch, path, args.arch, args.dataset, args.threshold) for epoch, path in ckpts]
+  rows = []
+  # Each worker is recycled after a few checkpoints to release the unpickled tensors
+  with mp.Pool(num_workers, initializer=initWorker, maxtasksperchild=4) as pool:
+    for ckpt_rows in pool.imap(analyze, jobs):
+      total = ckpt_rows[-1]
+      print("epoch {}: model size {:.2f}MB, inference {:.1f} MFLOPs".format(total[0], total[-2], total[-1]))
+      rows.extend(ckpt_rows)
+
+  writeTable(rows, args.out)
+  print("[INFO] {} rows written to {} ({:.1f}s)".format(len(rows), args.out, time.time() - start))
+
+if __name__ == '__main__':
+  main()
@@ -20,7 +20,8 @@ from os import listdir
 from os.path import isfile, join
 from statistics import mean
 
-from ..src.custom.checkpoint_utils_fp32 import Checkpoint
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from custom.checkpoint_utils import Checkpoint
 from custom.visualize_utils import plotFilterSparsity, plotLayerSparsity, plotFilterData
 
 MB = 1024*1024
@@ -84,7 +85,7 @@ def main():
         if idx == 0 : model.printParams()
 
         # Generate conv layer sparsity
-        sparse_bi_map, sparse_val_map, num_lyrs, conv_density, model_size, inf_cost =\
+        sparse_bi_map, sparse_val_map, num_lyrs, conv_density, rand_density, model_size, inf_cost =\
                 model.getConvStructSparsity(threshold, out_dir+"/out_txt")
         
         if get_fil_data:
@@ -0,0 +1,81 @@
+"""
+ Copyright 2019 Sangkug Lym
+ Copyright 2019 The University of Texas at Austin
+
+ Licensed under the Apache License, Version 2.0 (the "License");
+ you may not use this file except in compliance with the License.
+ You may obtain a copy of the License at
+
+     http://www.apache.org/licenses/LICENSE-2.0
+
+ Unless required by applicable law or agreed to in writing, software
+ distributed under the License is distributed on an "AS IS" BASIS,
+ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ See the License for the specific language governing permissions and
+ limitations under the License.
+"""
+
+import os, sys
+import argparse
+import tempfile
+import importlib.util
+
+import torch
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import models.cifar as models_cifar
+import models.imagenet as models_imagenet
+from custom import _makeSparse, _genDenseModel, _DataParallel
+from custom.channel_graph import getChannelGraph
+from custom_arch import custom_arch_cifar, custom_arch_imagenet
+
+parser = argparse.ArgumentParser(description='Channel graph of the generated gated models vs. the flattened models')
+parser.add_argument('-a', '--archs', nargs='+', default=['resnet32_flat', 'resnet50_bt_flat', 'resnet50_flat'],
+                    help='flattened residual models to check')
+parser.add_argument('--sparsity', default=0.2, type=float,
+                    help='ratio of output channels forced to zero before the reconfiguration')
+parser.add_argument('--threshold', default=0.0001, type=float,
+                    help='threshold to force weight to zero')
+args = parser.parse_args()
+
+
+""" Generated gated model of a randomly sparsified flattened model
+"""
+def genGatedModel(arch, dataset, out_dir):
+  models, custom_arch = (models_imagenet, custom_arch_imagenet) if dataset == 'imagenet' else (models_cifar, custom_arch_cifar)
+  model = _DataParallel(models.__dict__[arch]())
+  optimizer = torch.optim.SGD(model.parameters(), lr=0.1, momentum=0.9)
+  for p in model.parameters():
+    p.grad = torch.zeros_like(p)
+  optimizer.step()
+
+  with torch.no_grad():
+    for name, param in model.named_parameters():
+      if 'conv' in name and param.dim() == 4:
+        param[torch.rand(param.shape[0]) < args.sparsity] = 0
+
+  dense_chs, chs_map = _makeSparse(model, args.threshold, arch, 'max', dataset, is_gating=True)
+  _genDenseModel(model, dense_chs, optimizer, arch, dataset)
+  custom_arch[arch](model, None, out_dir, arch + '_gated.py', dense_chs, chs_map, True)
+
+  spec = importlib.util.spec_from_file_location(arch + '_gated', os.path.join(out_dir, arch + '_gated.py'))
+  module = importlib.util.module_from_spec(spec)
+  spec.loader.exec_module(module)
+  return _DataParallel(module.__dict__[arch]())
+
+
+def main():
+  out_dir = tempfile.mkdtemp()
+  for arch in args.archs:
+    dataset = 'imagenet' if arch in models_imagenet.__dict__ else 'cifar'
+    models = models_imagenet if dataset == 'imagenet' else models_cifar
+    ref = getChannelGraph(_DataParallel(models.__dict__[arch]()), arch)
+    out = getChannelGraph(genGatedModel(arch, dataset, out_dir), arch + '_gated')
+    for key in ref['stages']:
+      assert ref['stages'][key] == out['stages'][key], "Stage mismatch at [{}] stage {}".format(arch, key)
+    assert ref['rm_pairs'] == out['rm_pairs'], "Residual path mismatch at [{}]".format(arch)
+    print("[INFO] {}: {} shared spaces, {} residual paths match".format(arch, len(ref['stages']) -1,
+                                                                        len(ref['rm_pairs'])))
+
+if __name__ == '__main__':
+  main()
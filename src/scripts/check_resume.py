@@ -0,0 +1,102 @@
+"""
+ Copyright 2019 Sangkug Lym
+ Copyright 2019 The University of Texas at Austin
+
+ Licensed under the Apache License, Version 2.0 (the "License");
+ you may not use this file except in compliance with the License.
+ You may obtain a copy of the License at
+
+     http://www.apache.org/licenses/LICENSE-2.0
+
+ Unless required by applicable law or agreed to in writing, software
+ distributed under the License is distributed on an "AS IS" BASIS,
+ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ See the License for the specific language governing permissions and
+ limitations under the License.
+"""
+
+import os, sys
+import copy
+import argparse
+
+import torch
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import models.cifar as models_cifar
+import models.imagenet as models_imagenet
+from custom import _makeSparse, _genDenseModel, _applyArchSpec, _DataParallel, getArchSpec
+
+parser = argparse.ArgumentParser(description='Resume of reconfigured models from the stored layer spec')
+parser.add_argument('-a', '--archs', nargs='+', default=['resnet32_flat', 'resnet50_bt_flat'],
+                    help='flattened residual models to check')
+parser.add_argument('--sparsity', default=0.2, type=float,
+                    help='ratio of output channels forced to zero before the reconfiguration')
+parser.add_argument('--threshold', default=0.0001, type=float,
+                    help='threshold to force weight to zero')
+args = parser.parse_args()
+
+
+def newModel(arch, models):
+  model = _DataParallel(models.__dict__[arch]())
+  optimizer = torch.optim.SGD(model.parameters(), lr=0.1, momentum=0.9)
+  for p in model.parameters():
+    p.grad = torch.zeros_like(p)
+  optimizer.step()
+  return model, optimizer
+
+
+""" Reconfigured model and optimizer
+# inplace: in-place reconfiguration (DeadLayer placeholders)
+#          otherwise: relaunch / --arch_out_dir2 runs (Removed layers are deleted)
+# The first residual path (2nd and 3rd conv layers) is zeroed to be removed
+"""
+def reconfigure(arch, dataset, models, state, inplace):
+  model, optimizer = newModel(arch, models)
+  model.load_state_dict(state)
+  convs = [name for name, p in model.named_parameters() if 'conv' in name and p.dim() == 4]
+  with torch.no_grad():
+    params = dict(model.named_parameters())
+    params[convs[1]].zero_()
+    params[convs[2]].zero_()
+  dense_chs, _ = _makeSparse(model, args.threshold, arch, 'max', dataset)
+  _genDenseModel(model, dense_chs, optimizer, arch, dataset, inplace=inplace)
+  return model, optimizer
+
+
+def main():
+  torch.manual_seed(0)
+  for arch in args.archs:
+    dataset = 'imagenet' if arch in models_imagenet.__dict__ else 'cifar'
+    models = models_imagenet if dataset == 'imagenet' else models_cifar
+    x = torch.randn(2, 3, 224, 224) if dataset == 'imagenet' else torch.randn(2, 3, 32, 32)
+
+    # Randomly sparsified weights shared by both modes
+    model, _ = newModel(arch, models)
+    with torch.no_grad():
+      for name, param in model.named_parameters():
+        if 'conv' in name and param.dim() == 4:
+          param[torch.rand(param.shape[0]) < args.sparsity] = 0
+    state = copy.deepcopy(model.state_dict())
+
+    ref_model = reconfigure(arch, dataset, models, state, inplace=True)[0].eval()
+    with torch.no_grad():
+      ref_out = ref_model(x)
+
+    for inplace in [True, False]:
+      model, optimizer = reconfigure(arch, dataset, models, state, inplace)
+      arch_spec, model_state, optimizer_state = getArchSpec(model), model.state_dict(), optimizer.state_dict()
+
+      # Resume from the original model definition
+      resumed, resumed_optimizer = newModel(arch, models)
+      _applyArchSpec(resumed, arch_spec, resumed_optimizer)
+      resumed.load_state_dict(model_state)
+      resumed_optimizer.load_state_dict(optimizer_state)
+      for name, t in resumed.state_dict().items():
+        assert torch.equal(t, model_state[name]), "State mismatch at [{}] {}".format(arch, name)
+      with torch.no_grad():
+        out = resumed.eval()(x)
+      assert torch.allclose(out, ref_out, atol=1e-5), "Output mismatch at [{}] (inplace={})".format(arch, inplace)
+      print("[INFO] {}: resume of the {} reconfiguration matches".format(arch, 'in-place' if inplace else 'relaunch'))
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,46 @@
+"""
+ Copyright 2019 Sangkug Lym
+ Copyright 2019 The University of Texas at Austin
+
+ Licensed under the Apache License, Version 2.0 (the "License");
+ you may not use this file except in compliance with the License.
+ You may obtain a copy of the License at
+
+     http://www.apache.org/licenses/LICENSE-2.0
+
+ Unless required by applicable law or agreed to in writing, software
+ distributed under the License is distributed on an "AS IS" BASIS,
+ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ See the License for the specific language governing permissions and
+ limitations under the License.
+"""
+
+import os, sys
+import time
+import argparse
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from utils.imagenet_mmap import write_mmap_split
+from utils.dataset_cache import CachedImageFolder
+
+parser = argparse.ArgumentParser(description='One-time conversion of an ImageFolder ImageNet into memory-mapped uint8 shards')
+parser.add_argument('--data_path', required=True, type=str, help='ImageNet directory with the train/validation folders')
+parser.add_argument('-o', '--out', required=True, type=str, help='output directory (--data_path of --data-format mmap)')
+parser.add_argument('--splits', nargs='+', default=['train', 'validation'], type=str)
+parser.add_argument('--size', default=256, type=int, help='stored image size (short side resize + center crop)')
+parser.add_argument('--shard_size', default=10000, type=int, help='images per shard file')
+parser.add_argument('-j', '--workers', default=os.cpu_count(), type=int, help='decoding processes')
+args = parser.parse_args()
+
+
+def main():
+  for split in args.splits:
+    start = time.time()
+    folder = CachedImageFolder(os.path.join(args.data_path, split))
+    out_dir = os.path.join(args.out, split)
+    write_mmap_split(folder.samples, folder.classes, out_dir, args.size, args.shard_size, args.workers)
+    print("[INFO] {}: {} images of {}x{} in {:.1f}s".format(split, len(folder.samples), args.size, args.size,
+                                                          time.time() - start))
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,47 @@
+"""
+ Copyright 2019 Sangkug Lym
+ Copyright 2019 The University of Texas at Austin
+
+ Licensed under the Apache License, Version 2.0 (the "License");
+ you may not use this file except in compliance with the License.
+ You may obtain a copy of the License at
+
+     http://www.apache.org/licenses/LICENSE-2.0
+
+ Unless required by applicable law or agreed to in writing, software
+ distributed under the License is distributed on an "AS IS" BASIS,
+ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ See the License for the specific language governing permissions and
+ limitations under the License.
+"""
+
+import os, sys
+import time
+import argparse
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from utils.imagenet_shards import write_tar_shards
+from utils.dataset_cache import CachedImageFolder
+
+parser = argparse.ArgumentParser(description='One-time packing of an ImageFolder ImageNet into sequential tar shards')
+parser.add_argument('--data_path', required=True, type=str, help='ImageNet directory with the train/validation folders')
+parser.add_argument('-o', '--out', required=True, type=str, help='output directory (--data_path of --data-format shards)')
+parser.add_argument('--splits', nargs='+', default=['train', 'validation'], type=str)
+parser.add_argument('--shard_size', default=1000, type=int, help='images per tar shard (~110MB of ImageNet JPEGs)')
+parser.add_argument('--seed', default=0, type=int, help='seed of the packing order of the train split')
+args = parser.parse_args()
+
+
+def main():
+  for split in args.splits:
+    start = time.time()
+    folder = CachedImageFolder(os.path.join(args.data_path, split))
+    out_dir = os.path.join(args.out, split)
+    # Only the train split is shuffled (The shards of the other splits keep the class order)
+    write_tar_shards(folder.samples, folder.classes, out_dir, args.shard_size, shuffle=(split == 'train'), seed=args.seed)
+    print("[INFO] {}: {} images in {} shards in {:.1f}s".format(split, len(folder.samples),
+                                                              (len(folder.samples) + args.shard_size - 1) // args.shard_size,
+                                                              time.time() - start))
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,77 @@
+"""
+ Copyright 2019 Sangkug Lym
+ Copyright 2019 The University of Texas at Austin
+
+ Licensed under the Apache License, Version 2.0 (the "License");
+ you may not use this file except in compliance with the License.
+ You may obtain a copy of the License at
+
+     http://www.apache.org/licenses/LICENSE-2.0
+
+ Unless required by applicable law or agreed to in writing, software
+ distributed under the License is distributed on an "AS IS" BASIS,
+ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ See the License for the specific language governing permissions and
+ limitations under the License.
+"""
+
+import os, sys
+import time
+import argparse
+
+import torch
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import models.cifar as models_cifar
+import models.imagenet as models_imagenet
+from custom.cost_model import getLayerShapes, getLayerCost
+from custom.latency_table import LatencyTable, getModelLatency
+
+parser = argparse.ArgumentParser(description='Per-layer CPU latency lookup table of flattened models')
+parser.add_argument('-a', '--archs', nargs='+', default=['resnet32_flat'], help='flattened models to profile')
+parser.add_argument('-o', '--out', default='latency_table.json', type=str,
+                    help='lookup table (Extended if it exists)')
+parser.add_argument('--batch', default=32, type=int, help='mini-batch size of the measurements')
+parser.add_argument('--ratios', nargs='+', default=[1., 0.75, 0.5, 0.25, 0.125], type=float,
+                    help='channel counts of the grid (ratios of the layer channels)')
+parser.add_argument('--iters', default=10, type=int, help='timed iterations per grid point')
+parser.add_argument('--warmup', default=3, type=int)
+parser.add_argument('--threads', default=0, type=int, help='intra-op threads (0: torch default)')
+args = parser.parse_args()
+
+MFLOPS = 1000000/2
+
+
+def main():
+  if args.threads > 0:
+    torch.set_num_threads(args.threads)
+  table = LatencyTable(args.out, batch=args.batch, iters=args.iters, warmup=args.warmup)
+  if table.batch != args.batch:
+    print("[INFO] Extending [{}]: batch {} of the existing table".format(args.out, table.batch))
+
+  for arch in args.archs:
+    if arch in models_imagenet.__dict__:
+      model, dataset = models_imagenet.__dict__[arch](), 'imagenet'
+    else:
+      model, dataset = models_cifar.__dict__[arch](), 'cifar'
+
+    start = time.time()
+    table.profileModel(model, dataset, args.ratios)
+    table.save()
+    print("[INFO] {} profiled ({:.1f}s)".format(arch, time.time() - start))
+
+    # Predicted latency vs. FLOPs of each layer of the unpruned model
+    total, latency = getModelLatency(model, dataset, table)
+    print("layer, in_chs, out_chs, ms, train mflops")
+    for name, shape in getLayerShapes(model, dataset).items():
+      if shape['type'] == 'bn':
+        mflops = 0
+      else:
+        cost = getLayerCost(shape['weight_shape'], shape, batch=table.batch)
+        mflops = (cost['fwd'] + cost['wgrad'] + cost['dgrad']) / MFLOPS
+      print("{}, {}, {}, {:.3f}, {:.1f}".format(name, shape['in_shape'][0], shape['out_shape'][0],
+                                                latency[name], mflops))
+    print("{}: {:.2f} ms per iteration (fwd+bwd, batch {})".format(arch, total, table.batch))
+
+if __name__ == '__main__':
+  main()
@@ -5,3 +5,8 @@ from .logger import *
 from .eval import *
 
 import os, sys
+from .cifar_tensor import *
+from .imagenet_mmap import *
+from .imagenet_shards import *
+from .jpeg_collate import *
+from .dataset_cache import *
@@ -0,0 +1,81 @@
+'''In-memory CIFAR pipeline: the whole split is one uint8 tensor and a batch is
+augmented (random crop, horizontal flip) and normalized with a few tensor ops.
+No per-sample Python, PIL or worker processes.
+'''
+from __future__ import absolute_import
+
+import math
+
+import torch
+import torch.nn.functional as F
+
+__all__ = ['CIFAR_MEAN', 'CIFAR_STD', 'TensorLoader', 'tensor_cifar_loaders']
+
+CIFAR_MEAN = (0.4914, 0.4822, 0.4465)
+CIFAR_STD = (0.2023, 0.1994, 0.2010)
+
+
+class TensorLoader(object):
+    '''Batch iterator over a uint8 [N, 3, H, W] image tensor and its labels.
+    Same batches as a DataLoader with RandomCrop(padding) + RandomHorizontalFlip
+    (augment=True) and ToTensor + Normalize.
+
+    device: where the images are kept and augmented (e.g. the training GPU)
+    '''
+    def __init__(self, images, labels, batch_size, shuffle=False, augment=False, padding=4,
+                 mean=CIFAR_MEAN, std=CIFAR_STD, device='cpu'):
+        self.images = images.to(device).contiguous()
+        self.labels = labels.to(device)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.augment = augment
+        self.padding = padding
+        # Normalize((x / 255 - mean) / std) = x * scale + shift
+        std = torch.tensor(std, device=device).view(1, -1, 1, 1)
+        self.scale = 1. / (255. * std)
+        self.shift = -torch.tensor(mean, device=device).view(1, -1, 1, 1) / std
+
+    def __len__(self):
+        return int(math.ceil(float(len(self.labels)) / self.batch_size))
+
+    def crop_flip(self, x):
+        '''Per-image random crop of the zero-padded batch and random horizontal flip'''
+        n, c, h, w = x.shape
+        x = F.pad(x, [self.padding] * 4)
+        offsets = torch.randint(0, 2 * self.padding + 1, (2, n, 1), device=x.device)
+        rows = (offsets[0] + torch.arange(h, device=x.device)).view(n, 1, h, 1)
+        cols = torch.arange(w, device=x.device).expand(n, w)
+        # Flipped images read their columns backwards
+        flip = torch.rand(n, 1, device=x.device) < 0.5
+        cols = torch.where(flip, cols.flip(1), cols) + offsets[1]
+        batch = torch.arange(n, device=x.device).view(n, 1, 1, 1)
+        chs = torch.arange(c, device=x.device).view(1, c, 1, 1)
+        return x[batch, chs, rows, cols.view(n, 1, 1, w)]
+
+    def __iter__(self):
+        num = len(self.labels)
+        order = torch.randperm(num, device=self.images.device) if self.shuffle else None
+        for start in range(0, num, self.batch_size):
+            if order is None:
+                x = self.images[start:start + self.batch_size]
+                y = self.labels[start:start + self.batch_size]
+            else:
+                idx = order[start:start + self.batch_size]
+                x, y = self.images[idx], self.labels[idx]
+            if self.augment:
+                x = self.crop_flip(x)
+            yield x.float().mul_(self.scale).add_(self.shift), y
+
+
+def tensor_cifar_loaders(dataset, root, train_batch, test_batch, device='cpu', download=True):
+    '''Train (shuffled, augmented) and test TensorLoaders of CIFAR10/100
+    dataset: torchvision CIFAR dataset class (only used to read the raw split once)
+    '''
+    loaders = []
+    for train in [True, False]:
+        split = dataset(root=root, train=train, download=download and train)
+        images = torch.from_numpy(split.data).permute(0, 3, 1, 2).contiguous()
+        labels = torch.tensor(split.targets, dtype=torch.long)
+        loaders.append(TensorLoader(images, labels, train_batch if train else test_batch,
+                                    shuffle=train, augment=train, device=device))
+    return loaders
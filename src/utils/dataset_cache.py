@@ -0,0 +1,121 @@
+'''Startup caches of the datasets:
+    - CachedImageFolder: ImageFolder whose (path, class) sample list is stored in a
+      binary index next to the dataset instead of walking the class folders every launch
+    - verified_cifar: torchvision CIFAR whose md5 integrity check runs once per batch file version
+'''
+from __future__ import absolute_import
+
+import os
+import json
+import time
+import struct
+import hashlib
+
+import numpy as np
+import torchvision.datasets as datasets
+
+__all__ = ['CachedImageFolder', 'verified_cifar']
+
+MAGIC = b'PTIDX001'
+
+
+def _index_key(directory, class_to_idx, extensions):
+    '''Version of the sample list: the classes and the mtime of each class folder
+    (Adding/removing/renaming a file updates the mtime of its folder)'''
+    stats = [(cls, os.stat(os.path.join(directory, cls)).st_mtime_ns) for cls in sorted(class_to_idx)]
+    key = json.dumps([os.path.abspath(directory), stats, class_to_idx, sorted(extensions or [])])
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def _index_paths(directory):
+    '''Index next to the dataset folder, or in the user cache if the dataset is read-only'''
+    directory = os.path.abspath(directory).rstrip(os.sep)
+    user = os.path.join(os.path.expanduser('~'), '.cache', 'prunetrain',
+                        hashlib.sha1(directory.encode('utf-8')).hexdigest() + '.index')
+    return [directory + '.index', user]
+
+
+def _load_index(path, key):
+    if not os.path.isfile(path):
+        return None, None
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            return None, None
+        header = json.loads(f.read(struct.unpack('<Q', f.read(8))[0]).decode('utf-8'))
+        if header['key'] != key:
+            return None, None
+        labels = np.frombuffer(f.read(2 * header['num_samples']), dtype=np.int16).tolist()
+        names = f.read().decode('utf-8').split('\n') if header['num_samples'] > 0 else []
+    prefix = os.path.join(header['root'], '')
+    return [(prefix + name, label) for name, label in zip(names, labels)], header
+
+
+def _save_index(path, key, directory, samples, scan_seconds):
+    root = os.path.abspath(directory)
+    prefix = os.path.join(directory, '')
+    header = json.dumps({'key': key, 'root': root, 'num_samples': len(samples),
+                         'scan_seconds': scan_seconds}).encode('utf-8')
+    names = '\n'.join(p[len(prefix):] if p.startswith(prefix) else os.path.relpath(p, directory)
+                      for p, _ in samples).encode('utf-8')
+    if not os.path.isdir(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+    with open(path + '.tmp', 'wb') as f:
+        f.write(MAGIC + struct.pack('<Q', len(header)) + header)
+        f.write(np.array([label for _, label in samples], dtype=np.int16).tobytes())
+        f.write(names)
+    os.replace(path + '.tmp', path)
+
+
+class CachedImageFolder(datasets.ImageFolder):
+    '''ImageFolder with a cached sample list
+    index_info: 'cached' (loaded from the index), 'seconds' (load or scan time),
+                'scan_seconds' (time of the folder scan the index replaces)'''
+    def make_dataset(self, directory, class_to_idx, extensions=None, *args, **kwargs):
+        start = time.time()
+        key = _index_key(directory, class_to_idx, extensions)
+        for path in _index_paths(directory):
+            samples, header = _load_index(path, key)
+            if samples is not None:
+                self.index_info = {'cached': True, 'seconds': time.time() - start,
+                                   'scan_seconds': header['scan_seconds']}
+                return samples
+
+        samples = super(CachedImageFolder, self).make_dataset(directory, class_to_idx, extensions, *args, **kwargs)
+        scan_seconds = time.time() - start
+        for path in _index_paths(directory):
+            try:
+                _save_index(path, key, directory, samples, scan_seconds)
+                break
+            except OSError:
+                continue
+        self.index_info = {'cached': False, 'seconds': scan_seconds, 'scan_seconds': scan_seconds}
+        return samples
+
+
+def verified_cifar(dataset):
+    '''CIFAR10/100 class that skips the md5 check of batch files verified before
+    A stamp with the size and mtime of the verified files is kept in the dataset folder.
+    Without it, torchvision re-hashes the batches (twice with download=True) on every launch.'''
+    class VerifiedCIFAR(dataset):
+        def _check_integrity(self):
+            folder = os.path.join(self.root, self.base_folder)
+            files = [os.path.join(folder, name) for name, _ in self.train_list + self.test_list]
+            if not all(os.path.isfile(f) for f in files):
+                return False
+            stamp = json.dumps([(f, os.stat(f).st_size, os.stat(f).st_mtime_ns) for f in files])
+            stamp_file = os.path.join(folder, '.verified')
+            if os.path.isfile(stamp_file):
+                with open(stamp_file, 'r') as f:
+                    if f.read() == stamp:
+                        return True
+            if not super(VerifiedCIFAR, self)._check_integrity():
+                return False
+            try:
+                with open(stamp_file, 'w') as f:
+                    f.write(stamp)
+            except OSError:
+                pass
+            return True
+
+    VerifiedCIFAR.__name__ = dataset.__name__
+    return VerifiedCIFAR
@@ -0,0 +1,152 @@
+'''Pre-decoded, memory-mapped ImageNet format.
+A split is converted once into fixed-size uint8 images (short side resized to
+`size`, center crop of size x size, HWC) stored in raw shard files of
+`shard_size` images, a label index and a JSON header:
+
+    <out_dir>/<split>/meta.json     size, number of samples, shard size, classes
+    <out_dir>/<split>/labels.npy    int16 class index of each sample
+    <out_dir>/<split>/shard_%05d.u8 [shard_size, size, size, 3] uint8
+
+Training reads each crop as a view of the mapped shard (No decode, no file open per sample).
+Not a drop-in for RandomSizedCrop on the original JPEGs: the random crops are sampled from
+the stored center crop, so they never reach its discarded borders and cover a different
+range of scales/aspect ratios of the original image (The accuracy may differ).
+'''
+from __future__ import absolute_import
+
+import os
+import json
+import math
+import random
+import multiprocessing as mp
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+import torch.utils.data as data
+
+__all__ = ['IMAGENET_MEAN', 'IMAGENET_STD', 'write_mmap_split', 'MmapImageDataset', 'NormalizeCollate']
+
+IMAGENET_MEAN = (0.485, 0.456, 0.406)
+IMAGENET_STD = (0.229, 0.224, 0.225)
+
+
+def _load_resized(args):
+    '''Decode an image, resize its short side to size and center crop it to size x size'''
+    path, size = args
+    from PIL import Image
+    with open(path, 'rb') as f:
+        img = Image.open(f).convert('RGB')
+    w, h = img.size
+    scale = float(size) / min(w, h)
+    img = img.resize((max(size, int(round(w * scale))), max(size, int(round(h * scale)))), Image.BILINEAR)
+    w, h = img.size
+    left, top = (w - size) // 2, (h - size) // 2
+    return np.asarray(img.crop((left, top, left + size, top + size)), dtype=np.uint8)
+
+
+def write_mmap_split(samples, classes, out_dir, size=256, shard_size=10000, workers=8, verbose=True):
+    '''Convert a list of (image path, class index) into the memory-mapped format
+    The images are decoded by a pool of processes and written in sample order'''
+    if not os.path.isdir(out_dir):
+        os.makedirs(out_dir)
+    num_shards = int(math.ceil(float(len(samples)) / shard_size))
+    shards = ['shard_%05d.u8' % i for i in range(num_shards)]
+
+    pool = mp.Pool(workers)
+    try:
+        jobs = pool.imap(_load_resized, [(path, size) for path, _ in samples], chunksize=64)
+        for shard_id, shard in enumerate(shards):
+            num = min(shard_size, len(samples) - shard_id * shard_size)
+            images = np.memmap(os.path.join(out_dir, shard + '.tmp'), dtype=np.uint8, mode='w+',
+                               shape=(num, size, size, 3))
+            for i in range(num):
+                images[i] = next(jobs)
+            images.flush()
+            del images
+            os.replace(os.path.join(out_dir, shard + '.tmp'), os.path.join(out_dir, shard))
+            if verbose:
+                print('[INFO] %s: %d/%d samples' % (out_dir, shard_id * shard_size + num, len(samples)))
+    finally:
+        pool.close()
+        pool.join()
+
+    np.save(os.path.join(out_dir, 'labels.npy'), np.array([label for _, label in samples], dtype=np.int16))
+    with open(os.path.join(out_dir, 'meta.json'), 'w') as f:
+        json.dump({'size': size, 'num_samples': len(samples), 'shard_size': shard_size,
+                   'shards': shards, 'classes': classes}, f)
+
+
+class MmapImageDataset(data.Dataset):
+    '''Samples of a memory-mapped split as uint8 [3, crop, crop] tensors
+    train: random-resized-crop (scale, ratio as in RandomResizedCrop, relative to the stored
+           size x size image) and horizontal flip
+    otherwise: center crop
+    The shards are mapped lazily in each worker process.'''
+    def __init__(self, root, train=True, crop=224, scale=(0.08, 1.0), ratio=(3. / 4., 4. / 3.)):
+        with open(os.path.join(root, 'meta.json'), 'r') as f:
+            self.meta = json.load(f)
+        self.root = root
+        self.train = train
+        self.crop = crop
+        self.scale, self.ratio = scale, ratio
+        self.size = self.meta['size']
+        self.classes = self.meta['classes']
+        self.targets = np.load(os.path.join(root, 'labels.npy')).astype(np.int64)
+        self.shards = None
+
+    def __len__(self):
+        return self.meta['num_samples']
+
+    def _open(self):
+        # Copy-on-write mapping: writable views for torch.from_numpy, the files are never modified
+        shard_size, size = self.meta['shard_size'], self.size
+        self.shards = []
+        for shard_id, shard in enumerate(self.meta['shards']):
+            num = min(shard_size, len(self) - shard_id * shard_size)
+            self.shards.append(np.memmap(os.path.join(self.root, shard), dtype=np.uint8, mode='c',
+                                         shape=(num, size, size, 3)))
+
+    def _crop_params(self):
+        '''Random crop box (top, left, height, width) of the RandomResizedCrop distribution'''
+        area = self.size * self.size
+        for _ in range(10):
+            target_area = area * random.uniform(*self.scale)
+            aspect = math.exp(random.uniform(math.log(self.ratio[0]), math.log(self.ratio[1])))
+            w = int(round(math.sqrt(target_area * aspect)))
+            h = int(round(math.sqrt(target_area / aspect)))
+            if 0 < w <= self.size and 0 < h <= self.size:
+                return random.randint(0, self.size - h), random.randint(0, self.size - w), h, w
+        return 0, 0, self.size, self.size
+
+    def __getitem__(self, index):
+        if self.shards is None:
+            self._open()
+        shard_size = self.meta['shard_size']
+        image = self.shards[index // shard_size][index % shard_size]
+
+        if self.train:
+            top, left, h, w = self._crop_params()
+            # [h, w, 3] view of the mapped image >> [1, 3, h, w]
+            img = torch.from_numpy(image[top:top + h, left:left + w]).permute(2, 0, 1).unsqueeze(0)
+            img = F.interpolate(img.float(), size=(self.crop, self.crop), mode='bilinear', align_corners=False)
+            img = img.squeeze(0).round_().clamp_(0, 255).to(torch.uint8)
+            if random.random() < 0.5:
+                img = img.flip(2)
+        else:
+            offset = (self.size - self.crop) // 2
+            img = torch.from_numpy(image[offset:offset + self.crop, offset:offset + self.crop]).permute(2, 0, 1).contiguous()
+        return img, int(self.targets[index])
+
+
+class NormalizeCollate(object):
+    '''Batch collation of uint8 images: one float conversion and normalization per batch'''
+    def __init__(self, mean=IMAGENET_MEAN, std=IMAGENET_STD):
+        std = torch.tensor(std).view(1, -1, 1, 1)
+        self.scale = 1. / (255. * std)
+        self.shift = -torch.tensor(mean).view(1, -1, 1, 1) / std
+
+    def __call__(self, batch):
+        images = torch.stack([img for img, _ in batch])
+        targets = torch.tensor([target for _, target in batch], dtype=torch.long)
+        return images.float().mul_(self.scale).add_(self.shift), targets
@@ -0,0 +1,198 @@
+'''Streaming tar-shard ImageNet format (WebDataset style) for storage with slow random reads.
+A split is packed once into large tar files of `shard_size` samples, read sequentially:
+
+    <out_dir>/<split>/meta.json         number of samples, shards, classes
+    <out_dir>/<split>/shard_%05d.tar    <key>.jpg (original JPEG bytes), <key>.cls (class index)
+
+The training split is shuffled before packing; at training time each DataLoader worker
+streams its own subset of the shards and mixes the samples in a shuffle buffer.
+'''
+from __future__ import absolute_import
+
+import io
+import os
+import json
+import math
+import random
+import tarfile
+import threading
+import multiprocessing as mp
+from queue import Queue, Full
+
+import torch
+import torch.utils.data as data
+
+__all__ = ['write_tar_shards', 'TarShardDataset']
+
+
+def write_tar_shards(samples, classes, out_dir, shard_size=1000, shuffle=True, seed=0, verbose=True):
+    '''Pack a list of (image path, class index) into tar shards (The images are not re-encoded)
+    shuffle: pack the samples in a random order (Shards then hold a mix of the classes)'''
+    if not os.path.isdir(out_dir):
+        os.makedirs(out_dir)
+    samples = list(samples)
+    if shuffle:
+        random.Random(seed).shuffle(samples)
+    num_shards = int(math.ceil(float(len(samples)) / shard_size))
+    shards = ['shard_%05d.tar' % i for i in range(num_shards)]
+
+    for shard_id, shard in enumerate(shards):
+        chunk = samples[shard_id * shard_size:(shard_id + 1) * shard_size]
+        path = os.path.join(out_dir, shard)
+        with tarfile.open(path + '.tmp', 'w') as tar:
+            for i, (image, label) in enumerate(chunk):
+                key = '%08d' % (shard_id * shard_size + i)
+                tar.add(image, arcname=key + '.jpg')
+                cls = str(label).encode('ascii')
+                info = tarfile.TarInfo(key + '.cls')
+                info.size = len(cls)
+                tar.addfile(info, io.BytesIO(cls))
+        os.replace(path + '.tmp', path)
+        if verbose:
+            print('[INFO] %s: %d/%d samples' % (out_dir, shard_id * shard_size + len(chunk), len(samples)))
+
+    with open(os.path.join(out_dir, 'meta.json'), 'w') as f:
+        json.dump({'num_samples': len(samples), 'shard_size': shard_size, 'shards': shards,
+                   'classes': classes}, f)
+
+
+def _read_shard(path, buffer_size):
+    '''(JPEG bytes, class index) of a shard in file order, read in large sequential blocks'''
+    with open(path, 'rb', buffering=buffer_size) as f:
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        tar = tarfile.open(fileobj=f, mode='r|')
+        image, key = None, None
+        for info in tar:
+            if not info.isfile():
+                continue
+            name, ext = os.path.splitext(info.name)
+            payload = tar.extractfile(info).read()
+            if ext == '.jpg':
+                image, key = payload, name
+            elif ext == '.cls' and name == key:
+                yield image, int(payload)
+                image, key = None, None
+
+
+def _readahead(generator, depth, timeout=0.1):
+    '''Items of a generator produced by a background thread, up to `depth` ahead
+    (File reads release the GIL: the next samples are fetched while the current ones are decoded)
+    Closing this generator (consumer stopped early) stops the thread and closes the source generator
+    An exception of the source generator (I/O error, corrupt shard) is raised in the consumer'''
+    queue, end, stop = Queue(maxsize=depth), object(), threading.Event()
+    error = []
+
+    def put(item):
+        # Wait for a free slot unless the consumer is gone
+        while not stop.is_set():
+            try:
+                queue.put(item, timeout=timeout)
+                return True
+            except Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in generator:
+                if not put(item):
+                    break
+        except BaseException as e:
+            error.append(e)
+        finally:
+            if hasattr(generator, 'close'):
+                generator.close()
+            put(end)
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = queue.get()
+            if item is end:
+                if error:
+                    raise error[0]
+                return
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+
+
+class TarShardDataset(data.IterableDataset):
+    '''Samples of a tar-shard split, decoded by PIL and transformed like ImageFolder samples
+    Each epoch yields every sample once: the shards are permuted per epoch (set_epoch) and split
+    among the DataLoader workers; each worker streams its shards with `readahead` samples in
+    flight and shuffles them in a buffer of `shuffle_buffer` samples (0: file order).
+    decode=False: samples are the encoded images (uint8 tensors) for a batch-level decoder'''
+    def __init__(self, root, transform=None, shuffle_buffer=5000, readahead=256, buffer_size=4 << 20, seed=0,
+                 decode=True):
+        with open(os.path.join(root, 'meta.json'), 'r') as f:
+            self.meta = json.load(f)
+        self.root = root
+        self.transform = transform
+        self.shuffle_buffer = shuffle_buffer
+        self.readahead = readahead
+        self.buffer_size = buffer_size
+        self.seed = seed
+        self.decode = decode
+        self.classes = self.meta['classes']
+        # Shared with the worker processes (Persistent workers see the epoch of the main process)
+        self.epoch = mp.Value('i', 0)
+
+    def __len__(self):
+        return self.meta['num_samples']
+
+    def set_epoch(self, epoch):
+        self.epoch.value = epoch
+
+    def _samples(self, shards):
+        for shard in shards:
+            for sample in _read_shard(os.path.join(self.root, shard), self.buffer_size):
+                yield sample
+
+    def __iter__(self):
+        epoch = self.epoch.value
+        worker = data.get_worker_info()
+        worker_id, num_workers = (worker.id, worker.num_workers) if worker is not None else (0, 1)
+
+        # Same permutation in every worker: the worker subsets partition the shards
+        shards = list(self.meta['shards'])
+        if self.shuffle_buffer > 0:
+            random.Random(self.seed + epoch).shuffle(shards)
+        shards = shards[worker_id::num_workers]
+        samples = self._samples(shards)
+        if self.readahead > 0:
+            samples = _readahead(samples, self.readahead)
+
+        from PIL import Image
+        rng = random.Random((self.seed + epoch) * 1000003 + worker_id)
+        buf = []
+        # Iterator dropped mid-epoch: release the readahead thread and the open shard
+        try:
+            for sample in samples:
+                if self.shuffle_buffer == 0:
+                    yield self._decode(sample, Image)
+                    continue
+                if len(buf) < self.shuffle_buffer:
+                    buf.append(sample)
+                    continue
+                # Emit a random sample of the buffer and keep the new one in its place
+                idx = rng.randrange(len(buf))
+                buf[idx], sample = sample, buf[idx]
+                yield self._decode(sample, Image)
+        finally:
+            samples.close()
+        rng.shuffle(buf)
+        for sample in buf:
+            yield self._decode(sample, Image)
+
+    def _decode(self, sample, Image):
+        image, label = sample
+        if not self.decode:
+            return torch.frombuffer(bytearray(image), dtype=torch.uint8), label
+        img = Image.open(io.BytesIO(image)).convert('RGB')
+        if self.transform is not None:
+            img = self.transform(img)
+        return img, label
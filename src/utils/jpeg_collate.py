@@ -0,0 +1,87 @@
+'''Batch-level JPEG pipeline of the ImageNet loader: the datasets return the encoded bytes and
+the collation decodes the whole batch (torchvision.io, a pool of threads), crops and resizes
+the uint8 images and normalizes the stacked batch once.
+Validation images are decoded at a reduced size (DCT scaling of the JPEG decoder) when the
+stored image is larger than needed.
+'''
+from __future__ import absolute_import
+
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import torch
+import torchvision.transforms.functional as TF
+from torchvision.io import decode_jpeg, decode_image, read_file, ImageReadMode
+from torchvision.transforms import RandomResizedCrop
+
+from .imagenet_mmap import IMAGENET_MEAN, IMAGENET_STD, NormalizeCollate
+
+__all__ = ['read_jpeg_bytes', 'JpegDecodeCollate']
+
+
+def read_jpeg_bytes(path):
+    '''ImageFolder loader of the encoded file (uint8 tensor), decoded by JpegDecodeCollate'''
+    return read_file(path)
+
+
+def _decode(data):
+    '''[3, H, W] uint8 RGB image (Not all ImageNet files are JPEGs)'''
+    try:
+        return decode_jpeg(data, mode=ImageReadMode.RGB)
+    except RuntimeError:
+        return decode_image(data, mode=ImageReadMode.RGB)
+
+
+def _decode_reduced(data, size):
+    '''[3, H, W] uint8 RGB image decoded at the smallest 1/2, 1/4 or 1/8 scale with
+    both sides >= size (Full-size decode if the image is not large enough to be reduced)'''
+    from PIL import Image
+    img = Image.open(io.BytesIO(data.numpy().tobytes()))    # Header only
+    if img.format != 'JPEG' or min(img.size) < 2 * size:
+        return _decode(data)
+    img.draft('RGB', (size, size))
+    return torch.from_numpy(np.array(img.convert('RGB'))).permute(2, 0, 1)
+
+
+class JpegDecodeCollate(NormalizeCollate):
+    '''Collation of (encoded image, class index) samples into a normalized float batch
+    train: RandomResizedCrop(crop, scale, ratio) and horizontal flip, same as the PIL transforms
+    otherwise: short side resized to `resize` and center crop
+    threads: decoding threads per loader process (torchvision decode and resize release the GIL)'''
+    def __init__(self, train=True, crop=224, resize=256, scale=(0.08, 1.0), ratio=(3. / 4., 4. / 3.),
+                 threads=1, reduced_decode=True, mean=IMAGENET_MEAN, std=IMAGENET_STD):
+        super(JpegDecodeCollate, self).__init__(mean, std)
+        self.train = train
+        self.crop, self.resize = crop, resize
+        # (self.scale, self.shift: normalization of NormalizeCollate)
+        self.crop_scale, self.crop_ratio = scale, ratio
+        self.threads = threads
+        self.reduced_decode = reduced_decode
+        self.pool = None
+
+    def __getstate__(self):
+        # The thread pool is created in each loader worker
+        state = self.__dict__.copy()
+        state['pool'] = None
+        return state
+
+    def transform(self, data):
+        if self.train:
+            img = _decode(data)
+            top, left, h, w = RandomResizedCrop.get_params(img, self.crop_scale, self.crop_ratio)
+            img = TF.resized_crop(img, top, left, h, w, [self.crop, self.crop], antialias=True)
+            return img.flip(2) if torch.rand(1).item() < 0.5 else img
+        img = _decode_reduced(data, self.resize) if self.reduced_decode else _decode(data)
+        img = TF.resize(img, self.resize, antialias=True)
+        return TF.center_crop(img, [self.crop, self.crop])
+
+    def __call__(self, batch):
+        if self.threads > 1:
+            if self.pool is None:
+                self.pool = ThreadPoolExecutor(self.threads)
+            images = list(self.pool.map(self.transform, [data for data, _ in batch]))
+        else:
+            images = [self.transform(data) for data, _ in batch]
+        targets = torch.tensor([target for _, target in batch], dtype=torch.long)
+        return torch.stack(images).float().mul_(self.scale).add_(self.shift), targets
@@ -13,9 +13,11 @@ if os.environ.get('DISPLAY','') == '':
 import matplotlib.pyplot as plt
 import os
 import sys
+import json
+import time
 import numpy as np
 
-__all__ = ['Logger', 'LoggerMonitor', 'savefig']
+__all__ = ['Logger', 'LoggerMonitor', 'EventLog', 'savefig']
 
 def savefig(fname, dpi=None):
     dpi = 150 if dpi == None else dpi
@@ -89,6 +91,22 @@ class Logger(object):
         if self.file is not None:
             self.file.close()
 
+class EventLog(object):
+    '''Append-only JSONL stream of training events (one JSON object per line).
+    Each record has the event type, a wall-clock timestamp and the event fields.
+    A resumed run appends to the same stream.'''
+    def __init__(self, fpath):
+        self.file = open(fpath, 'a', buffering=1)
+
+    def write(self, event, **fields):
+        record = {'event': event, 'time': time.time()}
+        record.update(fields)
+        self.file.write(json.dumps(record, default=str) + '\n')
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
 class LoggerMonitor(object):
     '''Load and visualize multiple logs.'''
     def __init__ (self, paths):